@@ -0,0 +1,31 @@
+"""Add keyset pagination indexes
+
+Revision ID: 3f1c2a7b9d10
+Revises: 
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7b9d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # idx_continent_name was declared under a misspelled __table_args__ and never created
+    op.create_index('idx_continent_name', 'continents', ['name'], if_not_exists=True)
+    op.create_index('idx_continent_updated_code', 'continents', ['updated_at', 'code'], if_not_exists=True)
+    op.create_index('idx_country_updated_code', 'countries', ['updated_at', 'code'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_country_updated_code', table_name='countries', if_exists=True)
+    op.drop_index('idx_continent_updated_code', table_name='continents', if_exists=True)
+    op.drop_index('idx_continent_name', table_name='continents', if_exists=True)
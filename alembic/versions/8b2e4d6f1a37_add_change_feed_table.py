@@ -0,0 +1,36 @@
+"""Add change feed table
+
+Revision ID: 8b2e4d6f1a37
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a37'
+down_revision: Union[str, None] = '3f1c2a7b9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'changes',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False, comment='Monotonic change sequence number'),
+        sa.Column('entity', sa.String(length=16), nullable=False, comment="'country' or 'continent'"),
+        sa.Column('code', sa.String(length=2), nullable=False, comment='Primary key of the changed row'),
+        sa.Column('op', sa.String(length=8), nullable=False, comment="'upsert' or 'delete'"),
+        sa.Column('data', sa.JSON(), nullable=True, comment='Row contents after an upsert, NULL for a delete'),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('seq'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('changes')
@@ -0,0 +1,29 @@
+"""Add unique indexes on country iso3 and number
+
+Revision ID: c5e7a1d3f902
+Revises: 8b2e4d6f1a37
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a1d3f902'
+down_revision: Union[str, None] = '8b2e4d6f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if existing rows share an iso3 or number; deduplicate those first
+    op.create_index('idx_country_iso3', 'countries', ['iso3'], unique=True, if_not_exists=True)
+    op.create_index('idx_country_number', 'countries', ['number'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_country_number', table_name='countries', if_exists=True)
+    op.drop_index('idx_country_iso3', table_name='countries', if_exists=True)
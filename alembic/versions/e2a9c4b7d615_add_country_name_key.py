@@ -0,0 +1,42 @@
+"""Add the normalized country name column used by case-insensitive lookups
+
+Revision ID: e2a9c4b7d615
+Revises: c5e7a1d3f902
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9c4b7d615'
+down_revision: Union[str, None] = 'c5e7a1d3f902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('countries', sa.Column('name_key', sa.String(length=255), nullable=True,
+                                         comment='Normalized name, matched by case-insensitive lookups'))
+    # Backfilled in Python: SQL lower() only folds ASCII on SQLite
+    countries = sa.table('countries', sa.column('code', sa.String), sa.column('name', sa.String),
+                         sa.column('name_key', sa.String))
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(countries.c.code, countries.c.name)).all()
+    if rows:
+        bind.execute(
+            countries.update().where(countries.c.code == sa.bindparam('_code')),
+            [{'_code': code, 'name_key': " ".join(name.split()).casefold()} for code, name in rows],
+        )
+    with op.batch_alter_table('countries') as batch_op:
+        batch_op.alter_column('name_key', existing_type=sa.String(length=255), nullable=False)
+    op.create_index('idx_country_name_key', 'countries', ['name_key'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_country_name_key', table_name='countries', if_exists=True)
+    with op.batch_alter_table('countries') as batch_op:
+        batch_op.drop_column('name_key')
@@ -2,6 +2,14 @@
 
 # This file makes it easier to import CRUD functions elsewhere in the project
 from .crud import (
-    get_country_by_name, get_country_by_name_cached, get_countries, create_country, update_country, delete_country,
-    get_country_continent_mapping, get_continent_by_code, get_continents, create_continent, update_continent, delete_continent
+    get_country_by_name_cached, normalize_name, country_cache, create_country, update_country, delete_country,
+    update_country_by_code, update_continent_by_code, write_coalescer,
+    get_continent_by_code, create_continent, update_continent, delete_continent,
+    bulk_upsert_countries, stream_countries, EXPORT_COLUMNS, EXPORT_FIELDS, get_changes, get_latest_change_seq,
+    prime_statement_cache
 )
+from .snapshot import (
+    Snapshot, CountryRecord, ContinentRecord, get_snapshot, refresh_snapshot
+)
+from .cache import CacheBackend, make_cache, set_redis_client, start_caches, stop_caches
+from .pagination import encode_cursor, decode_cursor, next_cursor
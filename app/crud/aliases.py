@@ -0,0 +1,42 @@
+# Common alternate spellings and short forms of country names, keyed by
+# ISO 3166-1 alpha-2 code. Used by name suggestion and resolution on top of
+# the name and full_name stored in the database. Codes that are not present
+# in the database are ignored.
+COUNTRY_ALIASES = {
+    "AE": ("UAE", "Emirates"),
+    "BA": ("Bosnia", "Bosnia-Herzegovina"),
+    "BN": ("Brunei",),
+    "BO": ("Bolivia",),
+    "BS": ("Bahamas", "The Bahamas"),
+    "CD": ("DR Congo", "DRC", "Democratic Republic of the Congo", "Congo-Kinshasa", "Zaire"),
+    "CG": ("Republic of the Congo", "Congo-Brazzaville"),
+    "CI": ("Ivory Coast", "Cote d'Ivoire"),
+    "CV": ("Cabo Verde",),
+    "CZ": ("Czechia", "Czech Republic"),
+    "DE": ("Deutschland",),
+    "ES": ("Espana",),
+    "FK": ("Falklands", "Malvinas"),
+    "FM": ("Micronesia",),
+    "GB": ("UK", "U.K.", "Britain", "Great Britain", "United Kingdom"),
+    "GM": ("Gambia", "The Gambia"),
+    "IR": ("Iran",),
+    "KP": ("North Korea", "DPRK"),
+    "KR": ("South Korea", "Korea"),
+    "LA": ("Laos",),
+    "MD": ("Moldova",),
+    "MK": ("Macedonia", "North Macedonia"),
+    "MM": ("Burma",),
+    "NL": ("Holland", "The Netherlands"),
+    "PS": ("Palestine",),
+    "RU": ("Russia",),
+    "SY": ("Syria",),
+    "SZ": ("Swaziland", "Eswatini"),
+    "TL": ("East Timor", "Timor-Leste"),
+    "TR": ("Turkiye",),
+    "TW": ("Taiwan",),
+    "TZ": ("Tanzania",),
+    "US": ("USA", "U.S.", "U.S.A.", "United States", "America"),
+    "VA": ("Vatican", "Vatican City", "Holy See"),
+    "VE": ("Venezuela",),
+    "VN": ("Vietnam", "Viet Nam"),
+}
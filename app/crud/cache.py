@@ -0,0 +1,471 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import asdict, fields
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional: only needed for CACHE_BACKEND=redis or tiered
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the caches used by the CRUD read functions.
+
+    Subclasses provide storage (_get/_set/_delete/_clear); this class adds
+    single-flight loading, hit/miss counters and an invalidation guard, so
+    concurrent misses for the same key share a single in-flight load and a
+    load that started before an invalidation is not stored. If the caller
+    leading a load is cancelled, one of its followers takes the load over.
+
+    A cache is never a reason to fail a request: storage errors are logged,
+    reads then fall through to the loader, and failed invalidations drop what
+    this process holds.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that started before it is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @abstractmethod
+    async def _get(self, key: Hashable) -> Any:
+        """
+        Return the stored value, or _MISSING.
+        """
+
+    @abstractmethod
+    async def _set(self, key: Hashable, value: Any):
+        pass
+
+    @abstractmethod
+    async def _delete(self, keys: Tuple[Hashable, ...]):
+        pass
+
+    @abstractmethod
+    async def _clear(self):
+        pass
+
+    async def _lookup(self, key: Hashable) -> Any:
+        try:
+            return await self._get(key)
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} read of {key!r} failed, loading it instead: {e}")
+            return _MISSING
+
+    async def _store(self, key: Hashable, value: Any):
+        try:
+            await self._set(key, value)
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} write of {key!r} failed: {e}")
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss.
+        """
+        value = await self._lookup(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+            # The caller leading the load was cancelled, not us: load it ourselves,
+            # with our own loader (the leader's may be bound to its closed session)
+            return await self.get_or_load(key, loader)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+            if generation == self._generation:
+                await self._store(key, value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def invalidate(self, *keys: Hashable):
+        """
+        Remove the given keys from the cache. If the storage cannot be reached the
+        keys are only dropped from this process; shared copies expire with their TTL.
+        """
+        self._generation += 1
+        try:
+            await self._delete(keys)
+        except Exception as e:
+            logger.error(f"{type(self).__name__} invalidation of {len(keys)} keys failed: {e}")
+            self.clear_local()
+
+    async def clear(self):
+        """
+        Remove every entry from the cache, or at least from this process if the
+        storage cannot be reached.
+        """
+        self._generation += 1
+        try:
+            await self._clear()
+        except Exception as e:
+            logger.error(f"{type(self).__name__} clear failed: {e}")
+            self.clear_local()
+
+    def clear_local(self):
+        """
+        Drop whatever this process holds in memory; shared storage is left alone.
+        """
+        self._generation += 1
+
+    async def start(self):
+        """
+        Start background work such as listening for invalidations from other nodes.
+        """
+
+    async def stop(self):
+        """
+        Stop the background work started by start().
+        """
+
+    def local_size(self) -> int:
+        return 0
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the number of entries held in this process.
+        Misses that joined an in-flight load are also counted as coalesced.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": self.local_size(),
+        }
+
+
+class AsyncTTLCache(CacheBackend):
+    """
+    In-process LRU cache with per-entry TTL.
+    Values are stored by value rather than as coroutine objects.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 300):
+        super().__init__()
+        self._data = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def _get(self, key):
+        return self._data.get(key, _MISSING)
+
+    async def _set(self, key, value):
+        self._data[key] = value
+
+    async def _delete(self, keys):
+        self.discard(keys)
+
+    async def _clear(self):
+        self._data.clear()
+
+    def discard(self, keys):
+        """
+        Synchronously drop keys, e.g. when another node announced they changed.
+        """
+        self._generation += 1
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear_local(self):
+        super().clear_local()
+        self._data.clear()
+
+    def local_size(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "maxsize": self._data.maxsize}
+
+
+_redis_client = None
+
+
+def set_redis_client(client):
+    """
+    Use the given redis.asyncio-compatible client (e.g. fakeredis.aioredis.FakeRedis())
+    instead of connecting to REDIS_URL.
+    """
+    global _redis_client
+    _redis_client = client
+
+
+def redis_client():
+    """
+    Return the shared Redis client, connecting to REDIS_URL on first use.
+    """
+    global _redis_client
+    if _redis_client is None:
+        if aioredis is None:
+            raise RuntimeError("CACHE_BACKEND=redis/tiered requires the 'redis' package")
+        _redis_client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return _redis_client
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared by every node, stored in Redis (or anything speaking its protocol).
+
+    Keys live under "<namespace>:"; values are serialized with dumps/loads.
+    Invalidations are published on "<namespace>:invalidate" so that nodes with a
+    local tier in front (TieredCache) drop their copies too.
+    """
+
+    def __init__(self, namespace: str, ttl: float = 300,
+                 dumps: Callable[[Any], str] = json.dumps, loads: Callable[[Any], Any] = json.loads,
+                 client=None):
+        super().__init__()
+        self.namespace = namespace
+        self.channel = f"{namespace}:invalidate"
+        self.ttl = ttl
+        self.dumps = dumps
+        self.loads = loads
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else redis_client()
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _get(self, key):
+        raw = await self.client.get(self._key(key))
+        return _MISSING if raw is None else self.loads(raw)
+
+    async def _set(self, key, value):
+        await self.client.set(self._key(key), self.dumps(value), px=int(self.ttl * 1000))
+
+    async def _delete(self, keys):
+        if keys:
+            await self.client.delete(*(self._key(key) for key in keys))
+            await self.client.publish(self.channel, json.dumps([str(key) for key in keys]))
+
+    async def _clear(self):
+        batch = []
+        async for key in self.client.scan_iter(match=f"{self.namespace}:*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+        await self.client.publish(self.channel, json.dumps("*"))
+
+
+class TieredCache(CacheBackend):
+    """
+    A process-local L1 in front of a shared Redis L2.
+
+    A miss in L1 is served from L2 when possible, so a cold node warms up from
+    Redis instead of the database. Invalidations published by any node are
+    applied to every node's L1.
+    """
+
+    # Seconds before resubscribing after the invalidation listener failed; doubles up to the max
+    retry_delay = 0.5
+    max_retry_delay = 30.0
+
+    def __init__(self, local: AsyncTTLCache, shared: RedisCache):
+        super().__init__()
+        self.local = local
+        self.shared = shared
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _get(self, key):
+        value = await self.local._get(key)
+        if value is not _MISSING:
+            self.l1_hits += 1
+            return value
+        value = await self.shared._get(key)
+        if value is not _MISSING:
+            self.l2_hits += 1
+            await self.local._set(key, value)
+        return value
+
+    async def _set(self, key, value):
+        await self.local._set(key, value)
+        await self.shared._set(key, value)
+
+    async def _delete(self, keys):
+        self.local.discard(keys)
+        await self.shared._delete(keys)
+
+    async def _clear(self):
+        self.local.clear_local()
+        await self.shared._clear()
+
+    def clear_local(self):
+        super().clear_local()
+        self.local.clear_local()
+
+    def _apply_invalidation(self, data):
+        try:
+            keys = json.loads(data)
+        except ValueError:
+            logger.warning(f"Ignoring malformed message on {self.shared.channel}: {data!r}")
+            self.clear_local()
+            return
+        if keys == "*":
+            self.clear_local()
+        else:
+            self._generation += 1
+            self.local.discard(keys)
+
+    async def _listen(self):
+        """
+        Apply invalidations published by every node to L1. When the subscription
+        fails it is retried with exponential backoff; L1 is cleared after every
+        (re)subscribe because messages published while disconnected are lost.
+        """
+        delay = self.retry_delay
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.shared.client.pubsub()
+                await pubsub.subscribe(self.shared.channel)
+                self.clear_local()
+                delay = self.retry_delay
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._apply_invalidation(message["data"])
+            except Exception as e:
+                logger.warning(f"Invalidation listener on {self.shared.channel} failed, "
+                               f"resubscribing in {delay:.1f}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.warning(f"Invalidation listener on {self.shared.channel} stopped with an error: {e}")
+            self._listener = None
+
+    def local_size(self) -> int:
+        return self.local.local_size()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "l1_hits": self.l1_hits, "l2_hits": self.l2_hits}
+
+
+def dataclass_codec(cls) -> Tuple[Callable[[Any], str], Callable[[Any], Any]]:
+    """
+    Return (dumps, loads) serializing instances of a dataclass (or None) as JSON,
+    with datetime fields as ISO 8601 strings.
+    """
+    datetime_fields = [f.name for f in fields(cls) if "datetime" in str(f.type)]
+
+    def dumps(value) -> str:
+        if value is None:
+            return "null"
+        data = asdict(value)
+        for name in datetime_fields:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return json.dumps(data)
+
+    def loads(raw):
+        data = json.loads(raw)
+        if data is None:
+            return None
+        for name in datetime_fields:
+            if data[name] is not None:
+                data[name] = datetime.fromisoformat(data[name])
+        return cls(**data)
+
+    return dumps, loads
+
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local").lower()
+_caches: List[CacheBackend] = []
+
+
+def make_cache(namespace: str, maxsize: int = 1000, ttl: float = 300,
+               codec: Tuple[Callable, Callable] = (json.dumps, json.loads),
+               backend: Optional[str] = None) -> CacheBackend:
+    """
+    Create a cache of the kind selected by CACHE_BACKEND (local, redis or tiered).
+    The codec is only used by the Redis tier.
+    """
+    backend = backend or CACHE_BACKEND
+    dumps, loads = codec
+    if backend == "local":
+        cache = AsyncTTLCache(maxsize=maxsize, ttl=ttl)
+    elif backend == "redis":
+        cache = RedisCache(namespace, ttl=ttl, dumps=dumps, loads=loads)
+    elif backend == "tiered":
+        # Keep L1 entries shorter-lived as a safety net for missed invalidation messages
+        cache = TieredCache(AsyncTTLCache(maxsize=maxsize, ttl=min(ttl, 60)),
+                            RedisCache(namespace, ttl=ttl, dumps=dumps, loads=loads))
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND {backend!r}; expected local, redis or tiered")
+    _caches.append(cache)
+    return cache
+
+
+async def start_caches():
+    """
+    Start the background work of every cache created with make_cache().
+    """
+    for cache in _caches:
+        await cache.start()
+
+
+async def stop_caches():
+    for cache in _caches:
+        await cache.stop()
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.metrics import db_write_batch_size
+
+logger = logging.getLogger(__name__)
+
+Operation = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteCoalescer:
+    """
+    Group commit for small mutations.
+
+    Operations submitted within window seconds of each other run in one session,
+    each inside its own SAVEPOINT, and are committed with a single COMMIT.
+    An operation that fails only rolls back its savepoint and its caller gets
+    the error; the others still commit. Every caller's future is resolved only
+    after the COMMIT (and after_commit) returned, so a result is never reported
+    before it is durable. If the COMMIT itself fails, every caller gets that error.
+    Once the COMMIT succeeded the callers succeed too: a failing after_commit is
+    logged and on_after_commit_error runs instead, e.g. to drop derived state.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], window: float,
+                 max_batch: int = 100,
+                 after_commit: Optional[Callable[[AsyncSession, List[Any]], Awaitable[None]]] = None,
+                 on_after_commit_error: Optional[Callable[[], Awaitable[None]]] = None):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self.after_commit = after_commit
+        self.on_after_commit_error = on_after_commit_error
+        self._pending: List[Tuple[Operation, asyncio.Future]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def submit(self, operation: Operation) -> Any:
+        """
+        Queue operation(session) for the next group commit and return its result.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((operation, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        try:
+            while self._pending:
+                # Operations arriving while a batch commits are picked up by the next one
+                await asyncio.sleep(self.window)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                await self._commit(batch)
+        finally:
+            self._task = None
+
+    async def _run_after_commit(self, session: AsyncSession, written: List[Any]):
+        try:
+            await self.after_commit(session, written)
+        except Exception as e:
+            logger.error(f"After-commit work for {len(written)} group-committed writes failed: {e}")
+            if self.on_after_commit_error:
+                try:
+                    await self.on_after_commit_error()
+                except Exception as e:
+                    logger.error(f"Recovering from failed after-commit work failed too: {e}")
+
+    async def _commit(self, batch: List[Tuple[Operation, asyncio.Future]]):
+        outcomes: List[Tuple[asyncio.Future, Any, bool]] = []
+        committed = False
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    for operation, future in batch:
+                        try:
+                            async with session.begin_nested():
+                                result = await operation(session)
+                        except Exception as e:
+                            outcomes.append((future, e, False))
+                        else:
+                            outcomes.append((future, result, True))
+                # From here on the writes are durable and their callers succeed
+                committed = True
+                db_write_batch_size.observe(len(batch))
+                if self.after_commit:
+                    await self._run_after_commit(session, [value for _, value, ok in outcomes if ok and value is not None])
+        except Exception as e:
+            if committed:
+                logger.error(f"Closing the session of a group commit failed: {e}")
+            else:
+                logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+                outcomes = [(future, value if not ok else e, False) for future, value, ok in outcomes]
+                handled = {id(future) for future, _, _ in outcomes}
+                outcomes += [(future, e, False) for _, future in batch if id(future) not in handled]
+
+        for future, value, ok in outcomes:
+            if future.done():  # The caller went away
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
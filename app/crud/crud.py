@@ -1,141 +1,368 @@
-from sqlite3 import IntegrityError
+from sqlalchemy import func, lambda_stmt, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-from app.models.models import Country, Continent
-from typing import List, Optional
-from datetime import datetime
-from cachetools import TTLCache, cached
+from app.models.models import Country, Continent, Change, normalize_name
+from typing import AsyncIterator, List, Optional, Sequence
+import os
+from app.crud.cache import dataclass_codec, make_cache
+from app.crud.coalesce import WriteCoalescer
+from app.crud.snapshot import CountryRecord, add_reload_listener, invalidate_snapshot, refresh_snapshot
+from app.database import async_session
+from app.crud.writes import (
+    CONTINENT_FIELDS, COUNTRY_FIELDS, dialect_insert, lock_change_log, log_change, row_data, upsert_set
+)
+from app.metrics import register_cache
 
 
+def _columns(model, fields: Sequence[str]) -> tuple:
+    return tuple(getattr(model, field) for field in fields)
+
+# Hot reads are lambda statements: each is compiled once per code path and cached,
+# and the values captured by the lambdas are sent as bound parameters.
+
 # CRUD operations for Country
-async def get_country_by_name(session: AsyncSession, country_name: str) -> Optional[Country]:
+#  Define a cache with a max size and TTL (time-to-live); CACHE_BACKEND selects local, redis or tiered storage
+country_cache = make_cache("country_name", maxsize=1000, ttl=300, codec=dataclass_codec(CountryRecord))
+register_cache("country_name", country_cache)
+# Writes in other workers show up as a new shared snapshot; drop names cached before it
+add_reload_listener(country_cache.clear_local)
+
+async def get_country_by_name_cached(session: AsyncSession, country_name: str) -> Optional[CountryRecord]:
     """
-    Retrieve a Country by its name.
+    Retrieve a Country by its name, case-insensitively, through the name cache.
+    Only the normalized name is used as the key; the session is used on a miss only.
+    Unknown names are cached too so repeated misses do not reach the database.
     """
-    result = await session.execute(
-        select(Country).where(Country.name == country_name).options(joinedload(Country.continent))
-    )
-    return result.scalar_one_or_none()
+    key = normalize_name(country_name)
+    return await country_cache.get_or_load(key, lambda: _load_country_record(session, key))
 
-#  Define a cache with a max size and TTL (time-to-live)
-country_cache = TTLCache(maxsize=1000, ttl=300)  # Cache up to 1000 items for 5 minutes
-@cached(cache=country_cache)
-async def get_country_by_name_cached(session: AsyncSession, country_name: str) -> Optional[Country]:
-    return await get_country_by_name(session, country_name)
+async def _load_country_record(session: AsyncSession, key: str) -> Optional[CountryRecord]:
+    """
+    Load the Country whose normalized name is key, as the name cache stores it.
+    Matches the indexed name_key column, which is casefolded in Python, so
+    non-ASCII names match on every database.
+    """
+    result = await session.execute(lambda_stmt(
+        lambda: select(Country.code, Country.name, Country.full_name, Country.iso3,
+                       Country.number, Country.continent_code, Country.updated_at)
+        .where(Country.name_key == key)
+    ))
+    row = result.first()
+    return CountryRecord(*row) if row else None
 
-async def get_countries(session: AsyncSession, skip: int = 0, limit: int = 10, updated_after: Optional[datetime] = None) -> List[Country]:
+EXPORT_COLUMNS = (Country.code, Country.name, Country.full_name, Country.iso3,
+                  Country.number, Country.continent_code, Country.updated_at)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+async def stream_countries(session: AsyncSession, batch_size: int = 500,
+                           fields: Optional[Sequence[str]] = None) -> AsyncIterator[list]:
     """
-    Retrieve a list of Countries with pagination and optional updated_at filter.
+    Stream all Countries ordered by code as batches of row tuples, selecting only
+    the given fields (all export columns by default).
+    Uses a server-side cursor, so memory use does not grow with the table.
     """
-    query = select(Country).offset(skip).limit(limit)
-    if updated_after:
-        query = query.where(Country.updated_at > updated_after)
-    result = await session.execute(query)
-    return result.scalars().all()
+    columns = _columns(Country, fields) if fields else EXPORT_COLUMNS
+    result = await session.stream(
+        select(*columns).order_by(Country.code).execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
 
 
 async def create_country(session: AsyncSession, country_data) -> Country:
     """
     Create a new Country.
     """
+    await lock_change_log(session)
     new_country = Country(**country_data.dict())
     session.add(new_country)
+    log_change(session, "country", new_country.code, row_data(new_country, COUNTRY_FIELDS))
     await session.commit()
     await session.refresh(new_country)
+    await refresh_snapshot(session)
+    await country_cache.invalidate(normalize_name(new_country.name))
     return new_country
 
+def _apply_update(db_obj, update_data):
+    for var, value in vars(update_data).items():
+        if value is not None:
+            setattr(db_obj, var, value)
+
 async def update_country(session: AsyncSession, db_country: Country, country_data) -> Country:
     """
     Update an existing Country.
     """
-    for var, value in vars(country_data).items():
-        if value is not None:
-            setattr(db_country, var, value)
+    await lock_change_log(session)
+    old_name = db_country.name
+    _apply_update(db_country, country_data)
+    log_change(session, "country", db_country.code, row_data(db_country, COUNTRY_FIELDS))
     await session.commit()
     await session.refresh(db_country)
+    await refresh_snapshot(session)
+    await country_cache.invalidate(normalize_name(old_name), normalize_name(db_country.name))
     return db_country
 
 async def delete_country(session: AsyncSession, db_country: Country):
     """
     Delete a Country.
     """
+    await lock_change_log(session)
     await session.delete(db_country)
+    log_change(session, "country", db_country.code)
     await session.commit()
+    await refresh_snapshot(session)
+    await country_cache.invalidate(normalize_name(db_country.name))
 
 # CRUD operations for Continent
 
-async def get_country_continent_mapping(session: AsyncSession) -> dict:
-    """
-    Retrieve a dictionary mapping each country name to its corresponding continent name.
-    """
-    result = await session.execute(
-        select(Country.name, Continent.name).join(Continent, Country.continent_code == Continent.code)
-    )
-    country_continent_mapping = {country: continent for country, continent in result.all()}
-    return country_continent_mapping
-
 async def get_continent_by_code(session: AsyncSession, code: str) -> Optional[Continent]:
     """
     Retrieve a Continent by its code.
     """
-    result = await session.execute(
-        select(Continent).where(Continent.code == code)
-    )
+    result = await session.execute(lambda_stmt(
+        lambda: select(Continent).where(Continent.code == code)
+    ))
     return result.scalar_one_or_none()
 
-async def get_continents(session: AsyncSession, skip: int = 0, limit: int = 10) -> List[Continent]:
-    """
-    Retrieve a list of Continents with pagination.
-    """
-    result = await session.execute(
-        select(Continent).offset(skip).limit(limit)
-    )
-    return result.scalars().all()
-
 async def create_continent(session: AsyncSession, continent_data) -> Continent:
     """
     Create a new Continent.
     """
+    await lock_change_log(session)
     new_continent = Continent(**continent_data.dict())
     session.add(new_continent)
+    log_change(session, "continent", new_continent.code, row_data(new_continent, CONTINENT_FIELDS))
     await session.commit()
     await session.refresh(new_continent)
+    await refresh_snapshot(session)
     return new_continent
 
 async def update_continent(session: AsyncSession, db_continent: Continent, continent_data) -> Continent:
     """
     Update an existing Continent.
     """
-    for var, value in vars(continent_data).items():
-        if value is not None:
-            setattr(db_continent, var, value)
+    await lock_change_log(session)
+    _apply_update(db_continent, continent_data)
+    log_change(session, "continent", db_continent.code, row_data(db_continent, CONTINENT_FIELDS))
     await session.commit()
     await session.refresh(db_continent)
+    await refresh_snapshot(session)
     return db_continent
 
 async def delete_continent(session: AsyncSession, db_continent: Continent):
     """
     Delete a Continent.
     """
+    await lock_change_log(session)
     await session.delete(db_continent)
+    log_change(session, "continent", db_continent.code)
     await session.commit()
+    await refresh_snapshot(session)
 
-async def bulk_create_countries(session: AsyncSession, countries: List[Country]) -> List[Country]:
-    session.add_all(countries)
-    try:
-        await session.commit()
-    except IntegrityError:
-        await session.rollback()
-        raise
-    return countries
+# Group commit for single-row updates
+
+async def _after_group_commit(session: AsyncSession, written: List):
+    """
+    Reload server-set columns of the rows a group commit wrote, then rebuild the
+    snapshot and invalidate caches once for the whole batch.
+    """
+    for model in (Country, Continent):
+        codes = [obj.code for obj in written if isinstance(obj, model)]
+        if codes:
+            await session.execute(
+                select(model).where(model.code.in_(codes)).execution_options(populate_existing=True)
+            )
+    stale_names = session.info.pop("stale_names", set())
+    await refresh_snapshot(session)
+    if stale_names:
+        await country_cache.invalidate(*stale_names)
+
+async def _after_group_commit_failed():
+    """
+    The caches and snapshot may now miss committed writes: drop them so the next
+    read reloads from the database.
+    """
+    invalidate_snapshot()
+    await country_cache.clear()
 
-async def bulk_update_countries(session: AsyncSession, countries: List[Country]) -> List[Country]:
-    for country in countries:
-        session.merge(country)
+# Set WRITE_COALESCE_MS (e.g. 2) to commit concurrent PUTs arriving within that window together
+write_coalescer = WriteCoalescer(
+    async_session,
+    window=float(os.getenv("WRITE_COALESCE_MS", "0")) / 1000,
+    max_batch=int(os.getenv("WRITE_COALESCE_MAX_BATCH", "100")),
+    after_commit=_after_group_commit,
+    on_after_commit_error=_after_group_commit_failed,
+)
+
+async def _update_country_in_batch(session: AsyncSession, code: str, country_data) -> Optional[Country]:
+    db_country = await session.get(Country, code)
+    if db_country is None:
+        return None
+    await lock_change_log(session)
+    stale_names = session.info.setdefault("stale_names", set())
+    stale_names.add(normalize_name(db_country.name))
+    _apply_update(db_country, country_data)
+    stale_names.add(normalize_name(db_country.name))
+    log_change(session, "country", db_country.code, row_data(db_country, COUNTRY_FIELDS))
+    await session.flush()
+    return db_country
+
+async def _update_continent_in_batch(session: AsyncSession, code: str, continent_data) -> Optional[Continent]:
+    db_continent = await session.get(Continent, code)
+    if db_continent is None:
+        return None
+    await lock_change_log(session)
+    _apply_update(db_continent, continent_data)
+    log_change(session, "continent", db_continent.code, row_data(db_continent, CONTINENT_FIELDS))
+    await session.flush()
+    return db_continent
+
+async def update_country_by_code(session: AsyncSession, code: str, country_data) -> Optional[Country]:
+    """
+    Update the Country with the given code, or return None if there is none.
+    With write coalescing enabled the update is committed together with concurrent ones.
+    """
+    if write_coalescer.enabled:
+        return await write_coalescer.submit(lambda batch: _update_country_in_batch(batch, code, country_data))
+    db_country = await session.get(Country, code)
+    if db_country is None:
+        return None
+    return await update_country(session, db_country, country_data)
+
+async def update_continent_by_code(session: AsyncSession, code: str, continent_data) -> Optional[Continent]:
+    """
+    Update the Continent with the given code, or return None if there is none.
+    With write coalescing enabled the update is committed together with concurrent ones.
+    """
+    if write_coalescer.enabled:
+        return await write_coalescer.submit(lambda batch: _update_continent_in_batch(batch, code, continent_data))
+    db_continent = await get_continent_by_code(session, code)
+    if db_continent is None:
+        return None
+    return await update_continent(session, db_continent, continent_data)
+
+# Bulk operations for Country
+
+BULK_CHUNK_SIZE = 500  # Rows per INSERT ... ON CONFLICT statement
+
+async def bulk_upsert_countries(session: AsyncSession, countries: List, update_existing: bool = True) -> List[dict]:
+    """
+    Create Countries in bulk, and update the ones that already exist if update_existing is set.
+    Each chunk is written with a single INSERT ... ON CONFLICT statement and the whole
+    request is committed in one transaction. An iso3 or number held by another
+    country is rejected even if that country gives it up in the same request.
+    Returns a per-row report (code, status, detail) in input order.
+    """
+    report = [None] * len(countries)
+    continent_codes = set((await session.execute(select(Continent.code))).scalars())
+
+    # iso3 and number are unique, so find which existing countries already hold them
+    owners = {}
+    for start in range(0, len(countries), BULK_CHUNK_SIZE):
+        chunk = countries[start:start + BULK_CHUNK_SIZE]
+        result = await session.execute(
+            select(Country.code, Country.iso3, Country.number).where(or_(
+                Country.iso3.in_({c.iso3 for c in chunk}), Country.number.in_({c.number for c in chunk})
+            ))
+        )
+        for code, iso3, number in result:
+            owners[("iso3", iso3)] = code
+            owners[("number", number)] = code
+
+    # Rows that would fail the whole chunk are rejected up front
+    codes = {country.code for country in countries}
+    accepted = []
+    seen = set()
+    for i, country in enumerate(countries):
+        keys = (("iso3", country.iso3), ("number", country.number))
+        clash = next((key for key in keys if key in seen or owners.get(key, country.code) != country.code), None)
+        if country.code in seen:
+            report[i] = {"code": country.code, "status": "error", "detail": "Duplicate code in request"}
+        elif country.continent_code not in continent_codes:
+            report[i] = {"code": country.code, "status": "error", "detail": "Unknown continent code"}
+        elif clash and clash not in seen and owners[clash] in codes:
+            # The unique indexes are checked row by row, so values cannot change hands in one statement
+            report[i] = {"code": country.code, "status": "error",
+                         "detail": f"{clash[0]} is held by {owners[clash]}, which this request also writes; "
+                                   f"move it to {country.code} in a later request"}
+        elif clash:
+            report[i] = {"code": country.code, "status": "error", "detail": f"{clash[0]} already used by another country"}
+        else:
+            seen.update((country.code, *keys))
+            accepted.append(i)
+
+    insert = dialect_insert(session)
+    await lock_change_log(session)
     try:
+        for start in range(0, len(accepted), BULK_CHUNK_SIZE):
+            chunk = accepted[start:start + BULK_CHUNK_SIZE]
+            codes = [countries[i].code for i in chunk]
+            existing = set((await session.execute(select(Country.code).where(Country.code.in_(codes)))).scalars())
+
+            rows = [countries[i].model_dump(include=set(COUNTRY_FIELDS)) for i in chunk]
+            stmt = insert(Country)
+            if update_existing:
+                stmt = stmt.on_conflict_do_update(index_elements=[Country.code],
+                                                  set_=upsert_set(stmt, Country, COUNTRY_FIELDS))
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[Country.code])
+            await session.execute(stmt, rows)
+
+            for i in chunk:
+                code = countries[i].code
+                if code not in existing:
+                    report[i] = {"code": code, "status": "created", "detail": None}
+                elif update_existing:
+                    report[i] = {"code": code, "status": "updated", "detail": None}
+                else:
+                    report[i] = {"code": code, "status": "exists", "detail": "Country already exists"}
+
+            written = [row for row in rows if update_existing or row["code"] not in existing]
+            if written:
+                await session.execute(
+                    Change.__table__.insert(),
+                    [{"entity": "country", "code": row["code"], "op": "upsert", "data": row} for row in written],
+                )
         await session.commit()
     except IntegrityError:
         await session.rollback()
         raise
-    return countries
+
+    if accepted:
+        await refresh_snapshot(session)
+        await country_cache.clear()
+    return report
+
+# Warm-up
+
+async def prime_statement_cache(session: AsyncSession):
+    """
+    Run the hot read statements once so their compiled SQL is cached before the
+    first request needs it. The lookups use a code no row has.
+    """
+    await _load_country_record(session, "")
+    await session.get(Country, "")
+    await get_continent_by_code(session, "")
+    await session.execute(select(Continent.code))
+    await get_changes(session, since=0, limit=1)
+    await get_latest_change_seq(session)
+    await session.rollback()
+
+# Change feed
+
+async def get_changes(session: AsyncSession, since: int = 0, limit: int = 1000) -> List[Change]:
+    """
+    Retrieve change-feed entries with a sequence number greater than since, in order.
+    """
+    result = await session.execute(lambda_stmt(
+        lambda: select(Change).where(Change.seq > since).order_by(Change.seq).limit(limit)
+    ))
+    return result.scalars().all()
+
+async def get_latest_change_seq(session: AsyncSession) -> int:
+    """
+    Retrieve the sequence number of the most recent change, or 0 if there is none.
+    """
+    result = await session.execute(lambda_stmt(lambda: select(func.max(Change.seq))))
+    return result.scalar() or 0
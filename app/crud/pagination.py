@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(updated_at: Optional[datetime], code: str) -> str:
+    """
+    Encode the (updated_at, code) keyset position of the last row on a page
+    as an opaque, URL-safe cursor.
+    """
+    payload = json.dumps([updated_at.isoformat() if updated_at else None, code], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, code = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(updated_at) if updated_at else None), str(code)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def next_cursor(page: list, limit: Optional[int]) -> Optional[str]:
+    """
+    Return the cursor for the page following the given one, or None when the
+    page was not full and there is nothing left to fetch.
+    """
+    if limit is None or len(page) < limit or not page:
+        return None
+    last = page[-1]
+    return encode_cursor(last.updated_at, last.code)
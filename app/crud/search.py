@@ -0,0 +1,176 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Base scores per match kind; shorter matched terms rank higher within a kind
+EXACT, PREFIX, WORD_PREFIX, FUZZY = 1000.0, 500.0, 300.0, 100.0
+
+
+@lru_cache(maxsize=65536)  # Bulk resolution sees the same spellings over and over
+def fold(text: str) -> str:
+    """
+    Normalize text for matching: strip accents, casefold, and reduce every run of
+    punctuation or whitespace to a single space.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance between a and b: Levenshtein plus swaps of
+    adjacent characters, the commonest typo ("frnace"). Gives up (returning
+    limit + 1) once it exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SuggestIndex:
+    """
+    In-memory autocomplete index over country names, full names, codes and aliases.
+
+    Prefix matches are found by bisecting a sorted term list; typo tolerance comes
+    from a trigram index whose candidates are checked with a bounded edit distance.
+    Build it once per snapshot; lookups do not touch the database.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str]]):
+        """
+        terms is an iterable of (text, code) pairs; text is folded here.
+        """
+        self.terms: List[Tuple[str, str]] = []  # (folded term, code)
+        seen = set()
+        for text, code in terms:
+            term = fold(text)
+            if term and (term, code) not in seen:
+                seen.add((term, code))
+                self.terms.append((term, code))
+        self.terms.sort()
+        self._keys = [term for term, _ in self.terms]
+
+        # Word starts inside multi-word terms, e.g. "korea" in "republic of korea"
+        words = []
+        for index, (term, _) in enumerate(self.terms):
+            for match in re.finditer(r" (?=\S)", term):
+                words.append((term[match.end():], index))
+        words.sort()
+        self._words = words
+        self._word_keys = [word for word, _ in words]
+
+        self._grams: Dict[str, List[int]] = {}
+        for index, (term, _) in enumerate(self.terms):
+            for gram in _trigrams(term):
+                self._grams.setdefault(gram, []).append(index)
+
+    def _prefix_range(self, keys: List[str], prefix: str) -> range:
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + "\uffff", lo=start)
+        return range(start, end)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+        """
+        Return up to limit (code, matched term, score) tuples, best first,
+        with at most one entry per country.
+        """
+        q = fold(query)
+        if not q:
+            return []
+        best: Dict[str, Tuple[float, str]] = {}
+
+        def offer(index: int, score: float):
+            term, code = self.terms[index]
+            score -= len(term) / 100  # Prefer shorter, more specific terms
+            if code not in best or score > best[code][0]:
+                best[code] = (score, term)
+
+        for index in self._prefix_range(self._keys, q):
+            offer(index, EXACT if self._keys[index] == q else PREFIX)
+        for position in self._prefix_range(self._word_keys, q):
+            offer(self._words[position][1], WORD_PREFIX)
+
+        if len(best) < limit and len(q) >= 3:
+            # Typo tolerance: compare the query with the same-length prefix of each candidate
+            max_edits = 1 if len(q) < 8 else 2
+            grams = _trigrams(q)
+            counts: Dict[int, int] = {}
+            for gram in grams:
+                for index in self._grams.get(gram, ()):
+                    counts[index] = counts.get(index, 0) + 1
+            # Each edit destroys at most four of the query's trigrams (a swap touches
+            # two characters), and the trailing-padding trigram is absent when the
+            # query is a strict prefix
+            required = len(grams) - 4 * max_edits - 1
+            candidates = [index for index, count in counts.items() if count >= required]
+            for index in candidates:
+                term = self.terms[index][0]
+                if len(term) < 3:
+                    # Any three letters are one edit away from some two-letter code
+                    continue
+                distance = min(
+                    _edit_distance(q, term[:len(q) + delta], max_edits) for delta in (-1, 0, 1)
+                )
+                if distance <= max_edits:
+                    offer(index, FUZZY - 10 * distance)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(code, term, round(score, 3)) for code, (score, term) in ranked[:limit]]
+
+
+def build_suggest_index(countries: Iterable, aliases: Mapping[str, Tuple[str, ...]]) -> SuggestIndex:
+    """
+    Build a SuggestIndex from country records and an alias table keyed by code.
+    """
+    def terms():
+        for country in countries:
+            yield country.name, country.code
+            yield country.full_name, country.code
+            yield country.iso3, country.code
+            yield country.code, country.code
+            for alias in aliases.get(country.code, ()):
+                yield alias, country.code
+
+    return SuggestIndex(terms())
+
+
+def build_name_table(countries: Iterable, aliases: Mapping[str, Tuple[str, ...]]) -> Dict[str, str]:
+    """
+    Map the folded name, full name, aliases and ISO codes of every country to its code.
+    When two countries share a term, names win over full names, full names over
+    aliases and aliases over codes.
+    """
+    countries = list(countries)
+    kinds = (
+        lambda c: (c.name,),
+        lambda c: (c.full_name,),
+        lambda c: aliases.get(c.code, ()),
+        lambda c: (c.iso3, c.code),
+    )
+    table: Dict[str, str] = {}
+    for terms in kinds:
+        for country in countries:
+            for term in terms(country):
+                table.setdefault(fold(term), country.code)
+    return table
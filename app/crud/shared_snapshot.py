@@ -0,0 +1,122 @@
+# Cross-worker publication of the read snapshot. With several uvicorn workers,
+# the worker that handles a write rebuilds the snapshot from the database and
+# publishes it to a data file plus an 8-byte version counter, both memory-mapped
+# by every worker. Readers compare the counter with their snapshot's version on
+# each request (a read from shared memory, no syscall) and reload from the data
+# file when it moved, so all workers converge on the same data without each one
+# querying the database.
+import asyncio
+import json
+import mmap
+import os
+import struct
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; publishing is then only serialized per process
+    fcntl = None
+
+_MAGIC = b"CCSNAP01"
+_HEADER = struct.Struct("<8sQQ")  # magic, version, payload length
+_COUNTER = struct.Struct("<Q")
+
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode_row(row: list) -> list:
+    # updated_at is always the last field of a record
+    if row[-1] is not None:
+        row[-1] = datetime.fromisoformat(row[-1])
+    return row
+
+
+class SharedSnapshotStore:
+    """
+    A snapshot data file and a memory-mapped version counter shared by all workers.
+
+    Point path at a tmpfs such as /dev/shm to keep it in shared memory.
+    """
+
+    # Seconds between attempts to take the publish lock while another worker holds it
+    lock_poll_interval = 0.005
+
+    def __init__(self, path: str):
+        self.path = path
+        self.counter_path = f"{path}.version"
+        fd = os.open(self.counter_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < _COUNTER.size:
+                os.ftruncate(fd, _COUNTER.size)
+            self._counter = mmap.mmap(fd, _COUNTER.size)
+        finally:
+            os.close(fd)
+        self._lock_fd = os.open(self.counter_path, os.O_RDWR)
+
+    def version(self) -> int:
+        """
+        The latest published version, or 0 if nothing has been published yet.
+        """
+        return _COUNTER.unpack_from(self._counter)[0]
+
+    @asynccontextmanager
+    async def lock(self):
+        """
+        Serialize rebuild-and-publish across processes, so a worker that read the
+        database earlier can never publish over a newer snapshot.
+        """
+        if fcntl is not None:
+            # Poll rather than block in a thread: a blocked flock() cannot be cancelled
+            # and would take the lock after its caller was gone, holding it for good
+            while True:
+                try:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self.lock_poll_interval)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def publish(self, countries: List[tuple], continents: List[tuple], built_at: datetime) -> int:
+        """
+        Write a new version of the data file and bump the counter. Call while holding lock().
+        """
+        version = self.version() + 1
+        payload = json.dumps(
+            {"built_at": built_at.isoformat(),
+             "countries": [[_encode_value(v) for v in row] for row in countries],
+             "continents": [[_encode_value(v) for v in row] for row in continents]},
+            separators=(",", ":"),
+        ).encode()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, version, len(payload)))
+            f.write(payload)
+        # Readers see either the old or the new file, never a partial one
+        os.replace(tmp_path, self.path)
+        _COUNTER.pack_into(self._counter, 0, version)
+        return version
+
+    def load(self) -> Tuple[int, Optional[datetime], List[list], List[list]]:
+        """
+        Map the data file and decode it into (version, build time, country rows, continent rows).
+        """
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, length = _HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot file")
+            payload = json.loads(data[_HEADER.size:_HEADER.size + length])
+        built_at = payload.get("built_at")
+        return (
+            version,
+            datetime.fromisoformat(built_at) if built_at else None,
+            [_decode_row(row) for row in payload["countries"]],
+            [_decode_row(row) for row in payload["continents"]],
+        )
@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import itertools
+import os
+from bisect import bisect_right
+from dataclasses import asdict, astuple, dataclass
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.crud.aliases import COUNTRY_ALIASES
+from app.crud.search import SuggestIndex, build_name_table, build_suggest_index, fold
+from app.crud.shared_snapshot import SharedSnapshotStore
+from app.database import async_session
+from app.models.models import Country, Continent
+
+
+@dataclass(frozen=True)
+class CountryRecord:
+    """
+    Immutable, session-independent copy of a Country row.
+    """
+    code: str
+    name: str
+    full_name: str
+    iso3: str
+    number: int
+    continent_code: str
+    updated_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class ContinentRecord:
+    """
+    Immutable, session-independent copy of a Continent row.
+    """
+    code: str
+    name: str
+    updated_at: Optional[datetime]
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Normalize a datetime to an aware UTC value so naive (SQLite) and aware
+    (PostgreSQL, query string) timestamps can be compared.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def keyset_key(record) -> Tuple[datetime, str]:
+    """
+    Return the (updated_at, code) sort key used for keyset pagination.
+    """
+    return (as_utc(record.updated_at) or _EPOCH, record.code)
+
+
+def _page(records: Tuple, keys: List[Tuple[datetime, str]], limit: Optional[int],
+          after: Optional[Tuple[datetime, str]], updated_after: Optional[datetime] = None) -> List:
+    start = 0
+    if after:
+        start = bisect_right(keys, (as_utc(after[0]) or _EPOCH, after[1]))
+    if updated_after:
+        # Skip every row whose updated_at is <= updated_after, whatever its code
+        start = max(start, bisect_right(keys, (as_utc(updated_after), "\uffff")))
+    end = None if limit is None else start + limit
+    return list(records[start:end])
+
+
+class Snapshot:
+    """
+    Immutable, indexed view of the countries and continents tables.
+    A new instance is built after every write and swapped in atomically,
+    so readers never observe a partially updated dataset.
+    """
+
+    def __init__(self, countries: Iterable[CountryRecord], continents: Iterable[ContinentRecord], version: int,
+                 built_at: Optional[datetime] = None):
+        self.version = version
+        self.built_at = built_at or datetime.now(timezone.utc)
+        self._memo = {}
+        self.countries: Tuple[CountryRecord, ...] = tuple(sorted(countries, key=lambda c: c.code))
+        self.continents: Tuple[ContinentRecord, ...] = tuple(sorted(continents, key=lambda c: c.code))
+
+        # Secondary indexes
+        self.country_by_code = MappingProxyType({c.code: c for c in self.countries})
+        self.country_by_name = MappingProxyType({c.name: c for c in self.countries})
+        self.country_by_iso3 = MappingProxyType({c.iso3: c for c in self.countries})
+        self.country_by_number = MappingProxyType({c.number: c for c in self.countries})
+        self.continent_by_code = MappingProxyType({c.code: c for c in self.continents})
+
+        grouped = {}
+        for country in self.countries:
+            grouped.setdefault(country.continent_code, []).append(country)
+        self.countries_by_continent = MappingProxyType({code: tuple(members) for code, members in grouped.items()})
+
+        # Per-continent aggregates, derived once per snapshot instead of a GROUP BY per request
+        self.continent_stats = tuple(
+            {
+                "code": continent.code,
+                "name": continent.name,
+                "country_count": len(self.countries_by_continent.get(continent.code, ())),
+                "country_codes": [c.code for c in self.countries_by_continent.get(continent.code, ())],
+            }
+            for continent in self.continents
+        )
+
+        # Keyset pagination order, with parallel key lists for bisection
+        self.countries_by_update = tuple(sorted(self.countries, key=keyset_key))
+        self.continents_by_update = tuple(sorted(self.continents, key=keyset_key))
+        self._country_keys = [keyset_key(c) for c in self.countries_by_update]
+        self._continent_keys = [keyset_key(c) for c in self.continents_by_update]
+
+        # Validators for conditional GETs. The ETag is derived from the content rather
+        # than the local version counter so every worker computes the same value.
+        digest = hashlib.blake2b(digest_size=12)
+        for record in self.countries + self.continents:
+            digest.update(repr(astuple(record)).encode())
+        self.etag = f'W/"{digest.hexdigest()}"'
+        # Row timestamps cannot serve as Last-Modified: deletes leave none behind, and
+        # SQLite's have one-second resolution. Every write rebuilds the snapshot, so use
+        # the build time, rounded up to the next whole second because HTTP dates have
+        # one-second resolution. It is only valid once that second has passed.
+        self.last_modified = self.built_at.replace(microsecond=0) + timedelta(seconds=1)
+
+        # Precomputed country name -> continent name mapping
+        self.country_continent_mapping = MappingProxyType({
+            c.name: self.continent_by_code[c.continent_code].name
+            for c in self.countries
+            if c.continent_code in self.continent_by_code
+        })
+
+    def memo(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Return a value derived from this snapshot (e.g. an encoded response body),
+        building it on first use. Derived values live and die with the snapshot.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = build()
+            return value
+
+    def embed_continent(self, country: CountryRecord) -> dict:
+        """
+        Return the country as a dict with its continent under "continent".
+        """
+        return {**asdict(country), "continent": self.continent_by_code.get(country.continent_code)}
+
+    def embed_countries(self, continent: ContinentRecord) -> dict:
+        """
+        Return the continent as a dict with its countries, ordered by code, under "countries".
+        """
+        return {**asdict(continent), "countries": list(self.countries_by_continent.get(continent.code, ()))}
+
+    @property
+    def suggest_index(self) -> SuggestIndex:
+        """
+        Autocomplete index over this snapshot's countries, built on first use.
+        """
+        return self.memo("suggest_index", lambda: build_suggest_index(self.countries, COUNTRY_ALIASES))
+
+    @property
+    def name_table(self) -> Dict[str, str]:
+        """
+        Folded country name, alias or ISO code -> country code, built on first use.
+        """
+        return self.memo("name_table", lambda: build_name_table(self.countries, COUNTRY_ALIASES))
+
+    def resolve_names(self, names: Sequence[str]) -> List[Optional[CountryRecord]]:
+        """
+        Resolve free-text country names (case-, accent- and punctuation-insensitive,
+        aliases included). Each distinct name is folded and looked up once.
+        Returns the country or None for every name, in input order.
+        """
+        table = self.name_table
+        resolved = {name: self.country_by_code.get(table.get(fold(name))) for name in set(names)}
+        return [resolved[name] for name in names]
+
+    def list_countries(self, limit: Optional[int] = 10, after: Optional[Tuple[datetime, str]] = None,
+                       updated_after: Optional[datetime] = None) -> List[CountryRecord]:
+        """
+        Return a page of countries in (updated_at, code) order, starting after the
+        given keyset position, optionally filtered by updated_at.
+        """
+        return _page(self.countries_by_update, self._country_keys, limit, after, updated_after)
+
+    def get_countries_by_codes(self, codes: Iterable[str]) -> Tuple[List[CountryRecord], List[str]]:
+        """
+        Look up many countries by code at once.
+        Returns the found countries and the missing codes, both in request order without duplicates.
+        """
+        found, missing = [], []
+        for code in dict.fromkeys(codes):
+            country = self.country_by_code.get(code)
+            if country:
+                found.append(country)
+            else:
+                missing.append(code)
+        return found, missing
+
+    def resolve_country(self, identifier: str) -> Optional[CountryRecord]:
+        """
+        Look up a country by any of its ISO 3166-1 codes: alpha-2, alpha-3 or numeric.
+        """
+        identifier = identifier.strip().upper()
+        # isdigit() alone also accepts characters such as "²" that int() rejects
+        if identifier.isascii() and identifier.isdigit():
+            return self.country_by_number.get(int(identifier))
+        if len(identifier) == 3:
+            return self.country_by_iso3.get(identifier)
+        return self.country_by_code.get(identifier)
+
+    def list_continents(self, limit: Optional[int] = 10,
+                        after: Optional[Tuple[datetime, str]] = None) -> List[ContinentRecord]:
+        """
+        Return a page of continents in (updated_at, code) order, starting after the
+        given keyset position.
+        """
+        return _page(self.continents_by_update, self._continent_keys, limit, after)
+
+
+_versions = itertools.count(1)
+_current: Optional[Snapshot] = None
+_lock = asyncio.Lock()
+_reload_listeners: List[Callable[[], None]] = []
+
+# Set SNAPSHOT_SHARED_PATH (e.g. /dev/shm/country-api-snapshot) when running several
+# workers, so a write in one worker is picked up by all of them
+SNAPSHOT_SHARED_PATH = os.getenv("SNAPSHOT_SHARED_PATH")
+_store = SharedSnapshotStore(SNAPSHOT_SHARED_PATH) if SNAPSHOT_SHARED_PATH else None
+
+
+def add_reload_listener(callback: Callable[[], None]):
+    """
+    Call callback whenever this worker picks up a snapshot published by another worker,
+    e.g. to drop process-local caches derived from the same data.
+    """
+    _reload_listeners.append(callback)
+
+
+async def _load_rows(session: AsyncSession) -> Tuple[List[tuple], List[tuple]]:
+    countries = await session.execute(
+        select(Country.code, Country.name, Country.full_name, Country.iso3,
+               Country.number, Country.continent_code, Country.updated_at)
+    )
+    continents = await session.execute(
+        select(Continent.code, Continent.name, Continent.updated_at)
+    )
+    return [tuple(row) for row in countries.all()], [tuple(row) for row in continents.all()]
+
+
+def _snapshot_from_rows(countries: Iterable, continents: Iterable, version: int,
+                        built_at: Optional[datetime] = None) -> Snapshot:
+    return Snapshot(
+        countries=(CountryRecord(*row) for row in countries),
+        continents=(ContinentRecord(*row) for row in continents),
+        version=version,
+        built_at=built_at,
+    )
+
+
+async def build_snapshot(session: AsyncSession) -> Snapshot:
+    """
+    Load both tables in full and build a new Snapshot from them.
+    """
+    countries, continents = await _load_rows(session)
+    return _snapshot_from_rows(countries, continents, next(_versions))
+
+
+async def _build_and_publish(session: AsyncSession) -> Snapshot:
+    if _store is None:
+        return await build_snapshot(session)
+    async with _store.lock():
+        countries, continents = await _load_rows(session)
+        # Publish the build time too, so every worker sends the same Last-Modified
+        built_at = datetime.now(timezone.utc)
+        version = _store.publish(countries, continents, built_at)
+    return _snapshot_from_rows(countries, continents, version, built_at)
+
+
+async def _rebuild(session: Optional[AsyncSession]) -> Snapshot:
+    global _current
+    if session is None:
+        async with async_session() as own_session:
+            _current = await _build_and_publish(own_session)
+    else:
+        _current = await _build_and_publish(session)
+    return _current
+
+
+async def _reload_from_store() -> Snapshot:
+    global _current
+    if _current is not None and _current.version == _store.version():
+        return _current
+    version, built_at, countries, continents = _store.load()
+    _current = _snapshot_from_rows(countries, continents, version, built_at)
+    for callback in _reload_listeners:
+        callback()
+    return _current
+
+
+async def refresh_snapshot(session: Optional[AsyncSession] = None) -> Snapshot:
+    """
+    Rebuild the snapshot and swap it in. Rebuilds are serialized so a slow
+    rebuild can never overwrite the result of a later one.
+    """
+    async with _lock:
+        return await _rebuild(session)
+
+
+async def get_snapshot() -> Snapshot:
+    """
+    Dependency returning the current snapshot, loading it on first use and
+    picking up versions published by other workers.
+    """
+    snapshot = _current
+    if snapshot is None:
+        async with _lock:
+            snapshot = _current or await _rebuild(None)
+    elif _store is not None and _store.version() != snapshot.version:
+        async with _lock:
+            snapshot = await _reload_from_store()
+    return snapshot
+
+
+def invalidate_snapshot():
+    """
+    Drop the current snapshot so the next reader reloads it from the database.
+    """
+    global _current
+    _current = None
@@ -0,0 +1,66 @@
+# Helpers shared by everything that writes countries and continents: the CRUD
+# functions, bulk upserts and the release seeding script (app.initial_data).
+from typing import Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Change, Country
+
+# Writable columns of each table, as recorded in the change feed
+CONTINENT_FIELDS = ("code", "name")
+COUNTRY_FIELDS = ("code", "name", "full_name", "iso3", "number", "continent_code")
+
+# Key of the PostgreSQL advisory lock serializing change-feed appends
+CHANGE_LOG_LOCK_KEY = 0x63636170695F6368  # "ccapi_ch"
+
+
+def row_data(row, fields) -> dict:
+    return {field: getattr(row, field) for field in fields}
+
+
+async def lock_change_log(session: AsyncSession):
+    """
+    Serialize change-feed appends until the current transaction ends. Call it
+    before the transaction writes anything, so it never waits holding row locks.
+
+    Change.seq is assigned when an entry is inserted, not when it commits: without
+    this, two writers could commit out of seq order and a client that read the
+    feed in between would skip the lower seq for good. PostgreSQL takes a
+    transaction-scoped advisory lock; SQLite already holds its database write
+    lock from the first write until commit.
+    """
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+
+
+def log_change(session: AsyncSession, entity: str, code: str, data: Optional[dict] = None):
+    """
+    Add a change-feed entry to the current transaction, which must hold lock_change_log().
+    An upsert carries the row contents; a delete (data is None) is a tombstone.
+    """
+    session.add(Change(entity=entity, code=code, op="upsert" if data is not None else "delete", data=data))
+
+
+def upsert_set(stmt, model, fields) -> dict:
+    """
+    Return the SET clause of an INSERT ... ON CONFLICT DO UPDATE: the given fields
+    and the columns derived from them take the proposed row's values, and
+    updated_at is bumped.
+    """
+    changes = {field: stmt.excluded[field] for field in fields if field != "code"}
+    if model is Country:
+        changes["name_key"] = stmt.excluded.name_key
+    return {**changes, "updated_at": func.now()}
+
+
+def dialect_insert(session: AsyncSession):
+    """
+    Return the dialect-specific insert() construct that supports ON CONFLICT.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Bulk upsert is not supported on {session.bind.dialect.name}")
@@ -1,32 +1,234 @@
+import asyncio
+import itertools
+import logging
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from contextlib import AsyncExitStack
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from app.metrics import TimedAsyncQueuePool, instrument_engine, register_collector
 
-load_dotenv()  # Load environment variables from .env
+logger = logging.getLogger(__name__)
+
+# Load environment variables from .env for local development. Deployed dynos get their
+# config vars from the environment, so skip the import and the directory search there.
+if os.path.exists(".env"):
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+def normalize_url(url: str) -> str:
+    # Heroku provides DATABASE_URL in postgres:// format, which is not compatible with SQLAlchemy
+    # We need to replace it with postgresql:// if it's present
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    # Ensure we're using the asyncpg driver
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
 
 # Get the DATABASE_URL from the environment
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./countries.db")
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./countries.db"))
 
-# Heroku provides DATABASE_URL in postgres:// format, which is not compatible with SQLAlchemy
-# We need to replace it with postgresql:// if it's present
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+# Log every SQL statement only when explicitly asked to; it is very expensive under load
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
 
-# Ensure we're using the asyncpg driver
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+# Compiled SQL kept per engine (SQLAlchemy's default is 500 statements); the lambda
+# statements of the CRUD layer are cached here
+QUERY_CACHE_SIZE = int(os.getenv("DATABASE_QUERY_CACHE_SIZE", "500"))
+# Prepared statements kept per asyncpg connection. Set it to 0 behind PgBouncer in
+# transaction pooling mode, where a statement prepared on one server connection is
+# not available on the next.
+PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_PREPARED_STATEMENT_CACHE_SIZE", "100"))
 
-print(f"Using DATABASE_URL: {DATABASE_URL}")  # Add this line for debugging
+def _engine_options(url: str) -> dict:
+    options = {"echo": SQL_ECHO, "future": True, "query_cache_size": QUERY_CACHE_SIZE}
+    # In-memory SQLite needs its single-connection pool; everything else gets the instrumented queue pool
+    if ":memory:" not in url:
+        options["poolclass"] = TimedAsyncQueuePool
+    if url.startswith("postgresql+asyncpg://"):
+        options["connect_args"] = {"prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE}
+    return options
 
 # Create the async engine
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+instrument_engine(engine)
+logger.info(f"Using database {engine.url.render_as_string(hide_password=True)}")
+
+# Optional read replicas, comma separated. GET handlers read from them; writes always use the primary
+DATABASE_READ_URLS = [normalize_url(url.strip()) for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+# A replica further behind than this (seconds), or failing its health check, is skipped
+READ_MAX_LAG_SECONDS = float(os.getenv("DATABASE_READ_MAX_LAG", "5"))
+READ_HEALTH_INTERVAL_SECONDS = float(os.getenv("DATABASE_READ_HEALTH_INTERVAL", "5"))
+# Clients read from the primary for this long after a write, so they see their own changes
+READ_STICKY_SECONDS = float(os.getenv("DATABASE_READ_STICKY_SECONDS", "5"))
+
+# Replay lag of a Postgres standby; 0 when it has replayed everything it received, or on a primary
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """
+    Read replica engines picked round-robin among the ones that passed their last
+    health check. choose() returns None when no replica is usable, and callers
+    fall back to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[AsyncEngine] = []
+        for index, url in enumerate(urls):
+            replica = create_async_engine(url, **_engine_options(url))
+            instrument_engine(replica, name=f"replica{index}")
+            self.engines.append(replica)
+        self.healthy = [True] * len(self.engines)
+        self.lag = [0.0] * len(self.engines)
+        self._turn = itertools.count()
+        self._monitor: Optional[asyncio.Task] = None
+        register_collector(self._collect)
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        for _ in range(len(self.engines)):
+            index = next(self._turn) % len(self.engines)
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+
+    async def _check(self, index: int):
+        replica = self.engines[index]
+        try:
+            async with replica.connect() as conn:
+                if replica.dialect.name == "postgresql":
+                    lag = float((await conn.execute(_PG_LAG_SQL)).scalar() or 0)
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0.0
+            healthy = lag <= READ_MAX_LAG_SECONDS
+        except Exception as e:
+            lag, healthy = float("inf"), False
+            if self.healthy[index]:
+                logger.warning(f"Read replica {index} failed its health check: {e}")
+        if healthy != self.healthy[index] and lag != float("inf"):
+            logger.warning(f"Read replica {index} is now {'healthy' if healthy else 'unhealthy'} (lag {lag:.1f}s)")
+        self.lag[index], self.healthy[index] = lag, healthy
+
+    async def check(self):
+        """
+        Health-check every replica once, giving each at most one check interval.
+        """
+        async def bounded(index):
+            try:
+                await asyncio.wait_for(self._check(index), READ_HEALTH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                if self.healthy[index]:
+                    logger.warning(f"Read replica {index} timed out during its health check")
+                self.lag[index], self.healthy[index] = float("inf"), False
+
+        await asyncio.gather(*(bounded(index) for index in range(len(self.engines))))
+
+    async def _run_monitor(self):
+        while True:
+            await asyncio.sleep(READ_HEALTH_INTERVAL_SECONDS)
+            await self.check()
+
+    async def start(self):
+        if self.engines and self._monitor is None:
+            await self.check()
+            self._monitor = asyncio.create_task(self._run_monitor())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+    def _collect(self):
+        yield "db_replica_healthy", "gauge", "Whether a read replica passed its last health check", [
+            ({"engine": f"replica{index}"}, int(healthy)) for index, healthy in enumerate(self.healthy)
+        ]
+        yield "db_replica_lag_seconds", "gauge", "Replay lag measured by the last health check", [
+            ({"engine": f"replica{index}"}, lag) for index, lag in enumerate(self.lag) if lag != float("inf")
+        ]
+
+
+replicas = ReplicaSet(DATABASE_READ_URLS)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the replica stored in info["replica"], if any.
+    Flushes, DML and SELECT ... FOR UPDATE always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing and getattr(clause, "is_select", False):
+            # Lambda statements (lambda_stmt) wrap the SELECT they build
+            statement = getattr(clause, "_resolved", clause)
+            if getattr(statement, "_for_update_arg", None) is None:
+                return replica.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
 
 # Create the async session factory
 async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+    engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
 )
 
+
+def read_session(primary: bool = False) -> AsyncSession:
+    """
+    Return a session whose reads go to a healthy replica, or to the primary when
+    primary is set or no replica is usable.
+    """
+    replica = None if primary else replicas.choose()
+    return async_session(info={"replica": replica}) if replica is not None else async_session()
+
+# Pooled connections opened per engine during startup so the first requests do not pay for connecting
+WARMUP_CONNECTIONS = int(os.getenv("DATABASE_WARMUP_CONNECTIONS", "2"))
+
+
+async def warm_pool(target: AsyncEngine, connections: int = WARMUP_CONNECTIONS) -> int:
+    """
+    Open up to connections pooled connections at once (never more than the pool size)
+    and check them back in. Returns the number of connections opened.
+    """
+    size = getattr(target.pool, "size", None)
+    if callable(size):
+        connections = min(connections, size())
+    async with AsyncExitStack() as stack:
+        # Wait for every attempt before raising, so no connect is left running unattended
+        opened = await asyncio.gather(*(stack.enter_async_context(target.connect()) for _ in range(connections)),
+                                      return_exceptions=True)
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+            await conn.execute(text("SELECT 1"))
+    return len(opened)
+
+
+async def warm_pools(connections: int = WARMUP_CONNECTIONS) -> int:
+    """
+    Warm the primary's pool and every replica's. A replica that cannot be reached is
+    only logged; the health check keeps it out of rotation.
+    """
+    opened = await warm_pool(engine, connections)
+    for index, replica in enumerate(replicas.engines):
+        try:
+            opened += await warm_pool(replica, connections)
+        except Exception as e:
+            logger.warning(f"Could not warm up read replica {index}: {e}")
+    return opened
+
 # Create the base class for declarative models
 Base = declarative_base()
 
@@ -1,7 +1,114 @@
-from typing import AsyncGenerator
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncGenerator, FrozenSet, Optional, Tuple
+from fastapi import Depends, HTTPException, Query, Request, Response
 from app.database import AsyncSession
-from app.database import async_session
+from app.database import READ_STICKY_SECONDS, async_session, replicas
+from app.crud.snapshot import Snapshot, as_utc, get_snapshot
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# Set after a write; holds the time until which the client's reads go to the primary
+STICKY_COOKIE = "read_primary_until"
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session on the primary. With read replicas configured, a client that sends a
+    write is pinned to the primary for a short window so it reads its own writes.
+    """
+    if replicas and request.method not in ("GET", "HEAD"):
+        until = time.time() + READ_STICKY_SECONDS
+        response.set_cookie(STICKY_COOKIE, f"{until:.3f}", max_age=max(1, round(READ_STICKY_SECONDS)),
+                            httponly=True, samesite="lax")
     async with async_session() as session:
         yield session
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Whether this client wrote recently enough that replicas may not have its changes yet.
+    """
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def _not_modified(request: Request, snapshot: Snapshot, now: datetime) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the snapshot validators.
+    If-None-Match takes precedence, as required by RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: ignore the W/ prefix on both sides
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or snapshot.etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and snapshot.last_modified <= now:
+        try:
+            since = as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        # A date in the future says nothing about the client's copy
+        return snapshot.last_modified <= since <= now
+    return False
+
+async def get_conditional_snapshot(request: Request, response: Response,
+                                   snapshot: Snapshot = Depends(get_snapshot)) -> Snapshot:
+    """
+    Dependency for read endpoints: answers 304 Not Modified when the client's copy is
+    current, before any rows are looked up or serialized, and otherwise sets the
+    ETag / Last-Modified validators on the response.
+    """
+    now = datetime.now(timezone.utc)
+    headers = {"ETag": snapshot.etag}
+    if snapshot.last_modified <= now:
+        # Within the snapshot's first (partial) second another write could still
+        # produce the same date, so only the ETag is sent until it has passed
+        headers["Last-Modified"] = format_datetime(snapshot.last_modified, usegmt=True)
+    if _not_modified(request, snapshot, now):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return snapshot
+
+async def page_limit(limit: int = Query(
+        10, description="Page size, at least 1; -1 returns every row")) -> Optional[int]:
+    """
+    Dependency for listings: the page size, or None for -1 (no limit).
+    Zero and other negative values are rejected with 400.
+    """
+    if limit == -1:
+        return None
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1, or -1 for all rows")
+    return limit
+
+def include_param(*allowed: str):
+    """
+    Build a dependency parsing ?include=a,b into the set of related resources to embed.
+    Unknown names are rejected with 400.
+    """
+    async def dependency(include: Optional[str] = Query(
+            None, description=f"Comma-separated related resources to embed: {', '.join(allowed)}")) -> FrozenSet[str]:
+        requested = frozenset(part.strip() for part in include.split(",") if part.strip()) if include else frozenset()
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+        return requested
+    return dependency
+
+
+def fields_param(*allowed: str):
+    """
+    Build a dependency parsing ?fields=a,b into the fields to return, in declaration
+    order, or None when the parameter is absent (all fields). Unknown names are rejected with 400.
+    """
+    async def dependency(fields: Optional[str] = Query(
+            None, description=f"Comma-separated fields to return: {', '.join(allowed)}")) -> Optional[Tuple[str, ...]]:
+        if not fields:
+            return None
+        requested = {part.strip() for part in fields.split(",") if part.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {', '.join(sorted(unknown))}")
+        return tuple(field for field in allowed if field in requested)
+    return dependency
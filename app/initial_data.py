@@ -1,193 +1,330 @@
+import argparse
 import asyncio
-import sys
+import hashlib
 import logging
-import requests
 import re
-import shlex
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import text
+import sys
+import time
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+import httpx
+from sqlalchemy import bindparam, delete, func, inspect, select
+
+from app.crud.writes import CONTINENT_FIELDS, COUNTRY_FIELDS, dialect_insert, lock_change_log, upsert_set
 from app.database import async_session, engine, Base
-from app.models.models import Continent
+from app.models.models import Change, Continent, Country, normalize_name
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Gist URL that contains the initial SQL data
+# Vendored copy of the seed data, so releases do not depend on the network
+DATA_FILE = Path(__file__).parent / "data" / "countries.sql"
+# Gist the data originally came from; pass --source gist to load it instead
 GIST_URL = "https://gist.githubusercontent.com/nobuti/3816985/raw/0c3ad0cf3854bc8c4ac8dcb335ee59de5218aa4f/gistfile1.txt"
 
-async def fetch_and_parse_sql():
+# Rows per executemany() call
+SEED_BATCH_SIZE = 1000
+
+# Tables we load, in foreign-key order, with the columns used when an INSERT has no column list
+SEED_TABLES = {
+    "continents": (Continent, "continent", CONTINENT_FIELDS),
+    "countries": (Country, "country", COUNTRY_FIELDS),
+}
+
+# One tokenizer for the whole dump. Strings are matched as single tokens, so
+# parentheses, commas and semicolons inside them are never mistaken for syntax;
+# everything outside an INSERT ... VALUES statement (CREATE TABLE etc.) is skipped.
+_TOKENS = re.compile(r"""
+    (?P<insert>INSERT\s+INTO\s+[`"]?(?P<table>\w+)[`"]?\s*(?:\((?P<columns>[^)]*)\))?\s*VALUES)
+  | '(?P<string>(?:[^'\\]|\\.|'')*)'
+  | (?P<comment>--[^\n]*)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<end>;)
+  | (?P<literal>[^\s,()';]+)
+""", re.IGNORECASE | re.VERBOSE)
+_ESCAPE = re.compile(r"''|\\(.)")
+
+
+def _unquote(value: str) -> str:
+    return _ESCAPE.sub(lambda m: m.group(1) if m.group(1) is not None else "'", value)
+
+
+def parse_sql(sql: str) -> Iterator[Tuple[str, dict]]:
     """
-    Fetches the SQL file from the gist and parses the SQL commands.
+    Yield (table, row) for every value tuple of every INSERT statement in a SQL dump,
+    in a single pass over the text.
     """
-    logger.info(f"Fetching SQL data from {GIST_URL}")
-    response = requests.get(GIST_URL)
-    if response.status_code == 200:
-        sql_commands = response.text.split(";")
-        logger.info(f"Successfully fetched SQL data. Found {len(sql_commands)} commands.")
-        return sql_commands
-    else:
-        logger.error(f"Failed to fetch the SQL file. Status code: {response.status_code}")
-        raise Exception(f"Failed to fetch the SQL file. Status code: {response.status_code}")
-
-def clean_sql_statement(sql):
-    # Remove COMMENT clauses
-    sql = re.sub(r"COMMENT\s+'[^']*'", "", sql)
-    # Remove ENGINE=InnoDB
-    sql = sql.replace("ENGINE=InnoDB", "")
-    # Replace backticks with double quotes for identifiers
-    sql = sql.replace("`", '"')
-    # Remove UNSIGNED as it's not supported in PostgreSQL
-    sql = sql.replace("UNSIGNED", "")
-    # Replace SMALLINT(3) ZEROFILL with INTEGER
-    sql = re.sub(r"SMALLINT\(\d+\)\s+ZEROFILL", "INTEGER", sql)
-    # Replace KEY with CREATE INDEX IF NOT EXISTS
-    sql = sql.replace("KEY ", "CREATE INDEX IF NOT EXISTS idx_")
-    # Fix PRIMARY KEY syntax
-    sql = sql.replace("PRIMARY KEY", "PRIMARY KEY ")
-    # Fix FOREIGN KEY syntax
-    sql = re.sub(r"CONSTRAINT\s+([^\s]+)\s+FOREIGN KEY", r"CONSTRAINT \1 FOREIGN KEY", sql)
-    
-    return sql.strip()
-
-def parse_value_set(value_set):
-    """
-    Parses a value set string into individual values, correctly handling commas within quoted strings.
-    """
-    # Remove surrounding parentheses
-    value_set = value_set.strip('()')
-    lexer = shlex.shlex(value_set, posix=True)
-    lexer.whitespace_split = True
-    lexer.whitespace = ','
-    lexer.quotes = '"\''
-    lexer.escape = ''
-    values = list(lexer)
-    # Remove surrounding quotes and strip whitespace
-    values = [v.strip('"\'').strip() for v in values]
-    return values
-
-async def drop_and_create_tables():
-    """
-    Drops all tables and recreates them based on the SQLAlchemy models.
+    table = columns = values = None
+    for token in _TOKENS.finditer(sql):
+        kind = token.lastgroup
+        if kind == "insert":
+            table = token.group("table").lower()
+            if token.group("columns"):
+                columns = [col.strip().strip('`"') for col in token.group("columns").split(",")]
+            else:
+                columns = SEED_TABLES[table][2] if table in SEED_TABLES else None
+        elif table is None or kind == "comment":
+            continue
+        elif kind == "open":
+            values = []
+        elif kind == "close" and values is not None:
+            if columns is not None:
+                if len(values) != len(columns):
+                    raise ValueError(f"Cannot map {len(values)} values to the columns of {table}: {values}")
+                yield table, dict(zip(columns, values))
+            values = None
+        elif kind == "end":
+            table = columns = values = None
+        elif values is not None:
+            if kind == "string":
+                values.append(_unquote(token.group("string")))
+            else:
+                literal = token.group()
+                values.append(None if literal.upper() == "NULL" else literal)
+
+
+def _country_row(row: dict) -> dict:
+    # The dump stores ISO numeric codes zero-filled, e.g. 020
+    if row.get("number") is not None:
+        row["number"] = int(row["number"])
+    return row
+
+
+async def read_source(source: str) -> str:
+    """
+    Return the SQL text of a local file, or of a URL ("gist" is shorthand for GIST_URL).
+    """
+    if source == "gist":
+        source = GIST_URL
+    if source.startswith(("http://", "https://")):
+        logger.info(f"Fetching seed data from {source}")
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            response = await client.get(source)
+            response.raise_for_status()
+            return response.text
+    logger.info(f"Reading seed data from {source}")
+    return Path(source).read_text(encoding="utf-8")
+
+
+def collect_rows(sql: str) -> Dict[str, List[dict]]:
+    """
+    Parse a SQL dump into rows per seeded table, keeping only the model columns.
+    Later rows with the same code replace earlier ones.
+    """
+    rows: Dict[str, Dict[str, dict]] = {table: {} for table in SEED_TABLES}
+    for table, row in parse_sql(sql):
+        if table not in SEED_TABLES:
+            continue
+        fields = SEED_TABLES[table][2]
+        row = {field: row.get(field) for field in fields}
+        if table == "countries":
+            row = _country_row(row)
+        rows[table][row["code"]] = row
+    return {table: list(by_code.values()) for table, by_code in rows.items()}
+
+
+async def seed(rows: Dict[str, List[dict]]) -> Dict[str, int]:
+    """
+    Upsert the given rows in one transaction and record them in the change feed.
+    Existing tables and rows are kept, so the API keeps serving while a release reseeds.
     """
     async with engine.begin() as conn:
-        logger.info("Dropping all tables...")
-        await conn.run_sync(Base.metadata.drop_all)
-        logger.info("Creating all tables...")
         await conn.run_sync(Base.metadata.create_all)
 
-async def process_sql_commands(sql_commands):
+    counts = {}
+    async with async_session() as session:
+        async with session.begin():
+            await lock_change_log(session)
+            insert = dialect_insert(session)
+            for table, (model, entity, fields) in SEED_TABLES.items():
+                table_rows = rows.get(table, [])
+                stmt = insert(model)
+                stmt = stmt.on_conflict_do_update(index_elements=[model.code], set_=upsert_set(stmt, model, fields))
+                for start in range(0, len(table_rows), SEED_BATCH_SIZE):
+                    batch = table_rows[start:start + SEED_BATCH_SIZE]
+                    await session.execute(stmt, batch)
+                    await session.execute(
+                        Change.__table__.insert(),
+                        [{"entity": entity, "code": row["code"], "op": "upsert", "data": row} for row in batch],
+                    )
+                counts[table] = len(table_rows)
+    return counts
+
+
+def row_hash(row, fields) -> str:
     """
-    Processes a list of SQL commands.
+    Hash of a row's field values, used to detect changed rows without comparing them field by field.
     """
-    async with async_session() as session:
-        for i, command in enumerate(sql_commands):
-            sql = clean_sql_statement(command)
-            if sql:
-                logger.info(f"Processing SQL command {i+1}/{len(sql_commands)}")
-                logger.info(f"Cleaned SQL: {sql[:100]}...")  # Log first 100 characters
-                await process_sql_command(sql, session)
+    values = tuple(row[name] if isinstance(row, dict) else getattr(row, name) for name in fields)
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
 
-async def process_sql_command(sql, session): 
+
+@dataclass
+class TablePlan:
     """
-    Processes a single SQL command.
+    The writes needed to make one table match the source.
     """
-    try:
-        if sql.startswith("CREATE TABLE"):
-            logger.info("Skipping CREATE TABLE statement (already handled by SQLAlchemy)")
-        elif sql.startswith("CREATE INDEX"):
-            logger.info("Skipping CREATE INDEX statement (already handled by SQLAlchemy)")
-        elif sql.startswith('INSERT INTO "continents"'):
-            await insert_into_continents(sql, session)
-        elif sql.startswith('INSERT INTO "countries"'):
-            await insert_into_countries(sql, session)
-        else:
-            logger.info("Skipping unknown SQL statement")
-        logger.info("SQL command executed successfully")
-    except SQLAlchemyError as e:
-        logger.error(f"Error executing SQL: {e}")
-        logger.error(f"Problematic SQL: {sql}")
-        await session.rollback()
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        logger.error(f"Problematic SQL: {sql}")
-        await session.rollback()
-        raise
+    inserts: List[dict] = field(default_factory=list)
+    updates: List[dict] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    # code -> names of the fields that differ, for the report
+    changed_fields: Dict[str, List[str]] = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.inserts or self.updates or self.deletes)
+
+
+async def plan_sync(session, rows: Dict[str, List[dict]]) -> Dict[str, TablePlan]:
+    """
+    Diff the source rows against the current table contents by code and row hash.
+    Tables that do not exist yet are treated as empty.
+    """
+    existing_tables = set(await (await session.connection()).run_sync(
+        lambda conn: inspect(conn).get_table_names()))
+    plans = {}
+    for table, (model, _, fields) in SEED_TABLES.items():
+        current = {}
+        if table in existing_tables:
+            query = select(*(getattr(model, name) for name in fields))
+            current = {row.code: row for row in (await session.execute(query)).all()}
+        plan = TablePlan()
+        source = {row["code"]: row for row in rows.get(table, [])}
+        for code, row in source.items():
+            existing = current.get(code)
+            if existing is None:
+                plan.inserts.append(row)
+            elif row_hash(row, fields) != row_hash(existing, fields):
+                plan.updates.append(row)
+                plan.changed_fields[code] = [name for name in fields if row[name] != getattr(existing, name)]
+        plan.deletes = sorted(code for code in current if code not in source)
+        plans[table] = plan
+    return plans
+
 
-async def insert_into_continents(sql, session):
-    """
-    Processes and executes INSERT INTO continents statements.
-    """
-    logger.info("Executing INSERT INTO continents statement")
-    values_list = re.findall(r'\(([^)]+)\)', sql)
-    for value_set in values_list:
-        values = parse_value_set(value_set)
-        logger.info(f"Parsed values for continents: {values}")
-        await session.execute(
-            text("INSERT INTO continents (code, name) VALUES (:code, :name)"),
-            {"code": values[0], "name": values[1]}
-        )
-    await session.commit()
-    logger.info(f"Inserted {len(values_list)} rows into continents")
-
-async def insert_into_countries(sql, session):
-    """
-    Processes and executes INSERT INTO countries statements.
-    """
-    logger.info("Executing INSERT INTO countries statement")
-    match = re.search(r'INSERT INTO "countries"\s*\(([^)]+)\)\s*VALUES\s*(.*)', sql, re.DOTALL)
-    if match:
-        columns_str = match.group(1)
-        values_str = match.group(2)
-        columns = [col.strip().strip('"') for col in columns_str.split(',')]
-        logger.info(f"Columns: {columns}")
-
-        # Extract each value set from the VALUES part
-        values_list = re.findall(r'\((.*?)\)(?:,|$)', values_str, re.DOTALL)
-        for value_set in values_list:
-            values = parse_value_set(value_set)
-            logger.info(f"Values: {values}")
-
-            params = dict(zip(columns, values))
-            logger.info(f"Params before conversion: {params}")
-
-            # Convert 'number' field to integer
-            if 'number' in params:
-                logger.info(f"Raw 'number' value before conversion: {params['number']}")
-                try:
-                    params['number'] = int(params['number'].lstrip('0') or '0')
-                    logger.info(f"'number' value converted to integer: {params['number']}")
-                except ValueError:
-                    logger.error(f"Invalid 'number' value: {params['number']}")
-                    raise ValueError(f"Invalid 'number' value: {params['number']}")
-
-            logger.info(f"Params after conversion: {params}")
-            await session.execute(
-                text(f"INSERT INTO countries ({', '.join(columns)}) VALUES ({', '.join([':'+col for col in columns])})"),
-                params
+async def apply_sync(session, plans: Dict[str, TablePlan]):
+    """
+    Apply sync plans in foreign-key order and record every write in the change feed.
+    Only inserted and updated rows get a new updated_at.
+    """
+    await lock_change_log(session)
+    changes = []
+    for table, (model, entity, fields) in SEED_TABLES.items():
+        plan = plans[table]
+        for start in range(0, len(plan.inserts), SEED_BATCH_SIZE):
+            await session.execute(model.__table__.insert(), plan.inserts[start:start + SEED_BATCH_SIZE])
+        if plan.updates:
+            stmt = (
+                model.__table__.update()
+                .where(model.__table__.c.code == bindparam("_code"))
+                .values(updated_at=func.now())
             )
-        await session.commit()
-        logger.info(f"Inserted {len(values_list)} rows into countries")
-    else:
-        logger.error("Failed to parse INSERT INTO countries statement")
+            params = [{"_code": row["code"], **{name: row[name] for name in fields if name != "code"}}
+                      for row in plan.updates]
+            if model is Country:
+                for param in params:
+                    param["name_key"] = normalize_name(param["name"])
+            for start in range(0, len(params), SEED_BATCH_SIZE):
+                await session.execute(stmt, params[start:start + SEED_BATCH_SIZE])
+        changes += [{"entity": entity, "code": row["code"], "op": "upsert", "data": row}
+                    for row in plan.inserts + plan.updates]
+
+    # Countries before the continents they reference
+    for table, (model, entity, _) in reversed(list(SEED_TABLES.items())):
+        plan = plans[table]
+        for start in range(0, len(plan.deletes), SEED_BATCH_SIZE):
+            await session.execute(delete(model).where(model.code.in_(plan.deletes[start:start + SEED_BATCH_SIZE])))
+        changes += [{"entity": entity, "code": code, "op": "delete", "data": None} for code in plan.deletes]
 
-async def init_db():
+    for start in range(0, len(changes), SEED_BATCH_SIZE):
+        await session.execute(Change.__table__.insert(), changes[start:start + SEED_BATCH_SIZE])
+
+
+async def sync(rows: Dict[str, List[dict]], dry_run: bool = False) -> Dict[str, TablePlan]:
+    """
+    Make the tables match the source with the fewest writes, in one transaction.
+    With dry_run the plan is computed and returned but nothing is written.
+    """
+    if not dry_run:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as session:
+        async with session.begin():
+            plans = await plan_sync(session, rows)
+            if not dry_run and any(plans.values()):
+                await apply_sync(session, plans)
+    return plans
+
+
+def format_report(plans: Dict[str, TablePlan]) -> List[str]:
+    """
+    Describe sync plans as one line per table plus one line per changed row.
+    """
+    lines = []
+    for table, plan in plans.items():
+        lines.append(f"{table}: {len(plan.inserts)} to insert, {len(plan.updates)} to update, "
+                     f"{len(plan.deletes)} to delete")
+        lines += [f"  + {row['code']}" for row in plan.inserts]
+        lines += [f"  ~ {code} ({', '.join(names)})" for code, names in plan.changed_fields.items()]
+        lines += [f"  - {code}" for code in plan.deletes]
+    return lines
+
+
+async def init_db(source: str = str(DATA_FILE), mode: str = "sync", dry_run: bool = False):
+    """
+    Seed the database from source. "sync" writes only the differences (and removes rows
+    missing from the source); "upsert" rewrites every source row and deletes nothing.
+    """
     logger.info("Starting database initialization...")
+    started = time.perf_counter()
     try:
-        await drop_and_create_tables()
-        sql_commands = await fetch_and_parse_sql()
-        await process_sql_commands(sql_commands)
-        logger.info("Database initialization completed successfully.")
+        rows = collect_rows(await read_source(source))
+        if mode == "upsert":
+            counts = await seed(rows)
+        else:
+            plans = await sync(rows, dry_run=dry_run)
     except Exception as e:
         logger.error(f"An error occurred during database initialization: {e}")
         raise
+    elapsed = time.perf_counter() - started
+    if mode == "upsert":
+        summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+        logger.info(f"Database initialization completed: upserted {summary} in {elapsed:.3f}s")
+        return counts
+    # Per-row lines are what a dry run is for; a real sync logs only the per-table totals
+    row_level = logging.INFO if dry_run else logging.DEBUG
+    for line in format_report(plans):
+        logger.log(row_level if line.startswith("  ") else logging.INFO, line)
+    if dry_run:
+        logger.info(f"Dry run: no changes were written ({elapsed:.3f}s)")
+    else:
+        logger.info(f"Database initialization completed in {elapsed:.3f}s")
+    return plans
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Create the tables and seed continents and countries.")
+    parser.add_argument("--source", default=str(DATA_FILE),
+                        help="SQL dump to load: a file path, a URL, or 'gist' for the original gist "
+                             "(default: the vendored data file)")
+    parser.add_argument("--mode", choices=("sync", "upsert"), default="sync",
+                        help="sync: write only inserted, changed and removed rows (default); "
+                             "upsert: rewrite every source row")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what sync would change without writing anything")
+    args = parser.parse_args(argv)
+    if args.dry_run and args.mode != "sync":
+        parser.error("--dry-run is only supported with --mode sync")
+    return args
+
 
 if __name__ == '__main__':
-    logger.info("Running database initialization script...")
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
     try:
-        asyncio.run(init_db())
-        logger.info("Script execution completed successfully.")
+        asyncio.run(init_db(args.source, args.mode, args.dry_run))
     except Exception as e:
         logger.error(f"Script execution failed: {e}")
         sys.exit(1)
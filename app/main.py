@@ -1,17 +1,140 @@
-from fastapi import FastAPI
-from app.routers import country_router, continent_router
+import time
 
-# Initialize the FastAPI app
-app = FastAPI(title="Country-Continent API", version="1.0.0")
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict
+
+from fastapi import FastAPI, Request, Response
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from app.crud import get_snapshot, prime_statement_cache, refresh_snapshot, start_caches, stop_caches
+from app.database import async_session, replicas, warm_pools
+from app.metrics import MetricsMiddleware, register_collector
+from app.routers import country_router, continent_router, change_router, metrics_router
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing the application, and in each warm-up phase of the last startup
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+startup_timings: Dict[str, float] = {}
+
+
+def _collect_startup_timings():
+    yield "app_startup_seconds", "gauge", "Time spent importing and warming up the worker, per phase", [
+        ({"phase": phase}, seconds) for phase, seconds in startup_timings.items()
+    ]
+
+
+register_collector(_collect_startup_timings)
+
+
+@contextmanager
+def _timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[phase] = time.perf_counter() - started
+
+
+async def warm_up(app: FastAPI) -> bool:
+    """
+    Pay the first-request costs up front: configure the ORM mappers, open pooled
+    connections, load the read snapshot and its indexes, compile the hot statements
+    and build the OpenAPI schema. Returns False if the database could not be reached;
+    the snapshot is then loaded lazily on the first read.
+    """
+    with _timed("mappers"):
+        configure_mappers()
+    with _timed("schemas"):
+        app.openapi()
+    try:
+        with _timed("pool"):
+            await warm_pools()
+        with _timed("snapshot"):
+            snapshot = await refresh_snapshot()
+            snapshot.suggest_index
+            snapshot.name_table
+        with _timed("statements"):
+            async with async_session() as session:
+                await prime_statement_cache(session)
+    except (SQLAlchemyError, OSError) as e:
+        logger.warning(f"Could not warm up against the database at startup: {e}")
+        return False
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the worker up and start cache invalidation listeners and replica health
+    checks before serving traffic.
+    """
+    app.state.ready = False
+    app.state.stopping = False
+    startup_timings.clear()
+    startup_timings["import"] = IMPORT_SECONDS
+    with _timed("startup"):
+        warmed = await warm_up(app)
+        await start_caches()
+        await replicas.start()
+    app.state.ready = warmed
+    logger.info("Startup timings: " + ", ".join(f"{phase} {seconds * 1000:.1f} ms"
+                                                for phase, seconds in startup_timings.items()))
+    yield
+    app.state.ready = False
+    app.state.stopping = True
+    await replicas.stop()
+    await stop_caches()
 
-# Include routers from the routers module
-app.include_router(country_router)
-app.include_router(continent_router)
 
-# Root endpoint
-@app.get("/")
 async def root():
     """
     Root endpoint that returns a welcome message.
     """
     return {"message": "Welcome to the Country-Continent API!"}
+
+
+async def ready(request: Request, response: Response):
+    """
+    Readiness probe: 200 once the worker is warmed up and holds a read snapshot,
+    503 while it cannot serve reads or is shutting down. Includes the startup timings.
+    """
+    state = request.app.state
+    if not getattr(state, "ready", False) and not getattr(state, "stopping", False):
+        # The database was unavailable during warm-up; ready once a snapshot loads
+        try:
+            await get_snapshot()
+            state.ready = True
+        except (SQLAlchemyError, OSError):
+            # Same failures warm_up() tolerates, e.g. connection refused
+            pass
+    if not getattr(state, "ready", False):
+        response.status_code = 503
+        return {"status": "unavailable"}
+    return {"status": "ready", "startup_ms": {phase: round(seconds * 1000, 1)
+                                             for phase, seconds in startup_timings.items()}}
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application with its middleware, routers and warm-up lifespan.
+    """
+    app = FastAPI(title="Country-Continent API", version="1.0.0", lifespan=lifespan)
+    app.add_middleware(MetricsMiddleware)
+
+    # Include routers from the routers module
+    app.include_router(country_router)
+    app.include_router(continent_router)
+    app.include_router(change_router)
+    app.include_router(metrics_router)
+
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/ready", ready, methods=["GET"])
+    return app
+
+
+app = create_app()
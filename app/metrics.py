@@ -0,0 +1,273 @@
+# In-process instrumentation exposed in the Prometheus text format at /metrics.
+# Metrics are per process: with several workers, each scrape reports the worker
+# that served it, as with any Prometheus client without a multiprocess collector.
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labelvalues, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets and optional labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labelvalues -> [per-bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues):
+        counts, total = self._values.setdefault(labelvalues, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labelvalues, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            cumulative += counts[-1]
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {total[0]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {cumulative}"
+
+
+_metrics: List = []
+# Callables returning (name, type, documentation, [(labels dict, value)]) for values read at scrape time
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[dict, float]]]]]] = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable):
+    """
+    Register a callable whose samples are read on every scrape (gauges, external counters).
+    """
+    _collectors.append(collector)
+
+
+def register_cache(name: str, cache):
+    """
+    Expose the hit/miss counters of a cache with a stats() method.
+    """
+    def collect():
+        stats = cache.stats()
+        labels = {"cache": name}
+        yield "cache_hits_total", "counter", "Cache lookups served from the cache", [(labels, stats["hits"])]
+        yield "cache_misses_total", "counter", "Cache lookups that had to load the value", [(labels, stats["misses"])]
+        yield "cache_hit_ratio", "gauge", "Fraction of cache lookups that were hits", [(labels, stats["hit_ratio"])]
+        yield "cache_entries", "gauge", "Number of entries currently cached", [(labels, stats["size"])]
+
+    register_collector(collect)
+
+
+http_request_duration = _register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_responses = _register(Counter(
+    "http_responses_total", "HTTP responses by route and status code", ("method", "route", "status")))
+db_statement_duration = _register(Histogram(
+    "db_statement_duration_seconds", "Database statement execution time", ("statement",)))
+db_statement_rows = _register(Histogram(
+    "db_statement_rows", "Rows affected or returned per database statement, where the driver reports it",
+    ("statement",), ROW_BUCKETS))
+db_pool_checkout_wait = _register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"))
+db_write_batch_size = _register(Histogram(
+    "db_write_batch_size", "Mutations committed together by the write coalescer", buckets=ROW_BUCKETS))
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    # Several collectors may report the same metric (one per cache or engine);
+    # the exposition format needs all samples of a metric together
+    families: Dict[str, Tuple[str, str, List[Tuple[dict, float]]]] = {}
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+    for name, (kind, documentation, samples) in families.items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            names = tuple(labels)
+            lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status code per route template
+    (e.g. /countries/{country_code}) rather than per raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route)
+            http_responses.inc(scope["method"], route, str(status))
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that records how long each checkout waited for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+# CacheStats names reported by SQLAlchemy execution contexts
+_CACHE_RESULTS = {
+    "CACHE_HIT": "hit",
+    "CACHE_MISS": "miss",
+    "CACHING_DISABLED": "disabled",
+    "NO_CACHE_KEY": "no_cache_key",
+    "NO_DIALECT_SUPPORT": "no_dialect_support",
+}
+
+
+def _statement_kind(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def instrument_engine(engine, name: str = "primary"):
+    """
+    Attach statement timing/row hooks to an (async) engine and expose its pool gauges,
+    labelled with the engine name.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    # Lookups in SQLAlchemy's compiled statement cache and in the driver's prepared
+    # statement cache (asyncpg only), by result
+    compiled_lookups: Dict[str, int] = {}
+    prepared_lookups: Dict[str, int] = {}
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Keyed by execution context: after_cursor_execute or handle_error removes the entry
+        conn.info.setdefault("query_start", {})[context] = time.perf_counter()
+        # The asyncpg adapter keys its per-connection LRU of prepared statements by SQL text
+        prepared = getattr(conn.connection.dbapi_connection, "_prepared_statement_cache", None)
+        if prepared is not None:
+            result = "hit" if statement in prepared else "miss"
+            prepared_lookups[result] = prepared_lookups.get(result, 0) + 1
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is not None:
+            result = _CACHE_RESULTS.get(cache_hit.name, cache_hit.name.lower())
+            compiled_lookups[result] = compiled_lookups.get(result, 0) + 1
+        kind = _statement_kind(statement)
+        db_statement_duration.observe(time.perf_counter() - conn.info["query_start"].pop(context), kind)
+        # DB-API drivers may report -1 (e.g. sqlite3 for SELECTs) when the count is unknown
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            db_statement_rows.observe(cursor.rowcount, kind)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        start = conn.info.get("query_start", {}).pop(exception_context.execution_context, None) if conn else None
+        if start is not None:
+            # Failed statements, such as ones cancelled by a timeout, are timed too
+            db_statement_duration.observe(time.perf_counter() - start, _statement_kind(exception_context.statement or ""))
+
+    def collect_pool():
+        pool = sync_engine.pool
+        labels = {"engine": name}
+        if hasattr(pool, "checkedout"):
+            yield "db_pool_checked_out", "gauge", "Connections currently checked out", [(labels, pool.checkedout())]
+            yield "db_pool_overflow", "gauge", "Connections open beyond the pool size", [(labels, max(pool.overflow(), 0))]
+            yield "db_pool_size", "gauge", "Configured pool size", [(labels, pool.size())]
+
+    def collect_statement_caches():
+        for cache, lookups, description in (("compiled", compiled_lookups, "SQLAlchemy compiled statement cache"),
+                                            ("prepared_statement", prepared_lookups, "asyncpg prepared statement cache")):
+            if not lookups:  # E.g. no prepared statement cache outside asyncpg
+                continue
+            yield f"db_{cache}_cache_lookups_total", "counter", f"Lookups in the {description} by result", [
+                ({"engine": name, "result": result}, count) for result, count in sorted(lookups.items())
+            ]
+            looked_up = lookups.get("hit", 0) + lookups.get("miss", 0)
+            if looked_up:
+                yield f"db_{cache}_cache_hit_ratio", "gauge", f"Fraction of lookups in the {description} that were hits", [
+                    ({"engine": name}, lookups.get("hit", 0) / looked_up)
+                ]
+
+    register_collector(collect_pool)
+    register_collector(collect_statement_caches)
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+async def _table_names() -> set:
+    async with engine.connect() as conn:
+        return set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+
+
+async def _create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def migrate():
+    """
+    Bring the schema to the latest migration. The migrations only alter existing
+    tables, so an empty database gets the current tables and is stamped as up to date.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    if "countries" not in asyncio.run(_table_names()):
+        logger.info("Empty database: creating the tables")
+        asyncio.run(_create_tables())
+        command.stamp(config, "head")
+    else:
+        command.upgrade(config, "head")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        migrate()
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
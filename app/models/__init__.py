@@ -1,2 +1,2 @@
 # This file makes it easier to import models elsewhere in the project
-from .models import Continent, Country
+from .models import Continent, Country, Change
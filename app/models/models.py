@@ -1,7 +1,25 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func, Index, JSON
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import relationship, validates
 from app.database import Base
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds. Bind datetimes in the same
+# text format so keyset comparisons against updated_at match what the server stored.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a country name for cache keys and case-insensitive lookups.
+    """
+    return " ".join(name.split()).casefold()
+
+def _name_key_default(context) -> str:
+    # Fills name_key for Core inserts (bulk upserts, seeding); ORM writes set it in Country.validate_name
+    return normalize_name(context.get_current_parameters()["name"])
+
 class Continent(Base):
     """
     SQLAlchemy model for the 'continents' table.
@@ -11,14 +29,15 @@ class Continent(Base):
 
     code = Column(String(2), primary_key=True, comment='Continent code')
     name = Column(String(255), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
 
     # Relationship to countries
     countries = relationship("Country", back_populates="continent")
 
-    # Adding index
-    table_args__ = (
+    # Adding indexes
+    __table_args__ = (
         Index('idx_continent_name', 'name'),
+        Index('idx_continent_updated_code', 'updated_at', 'code'),  # Keyset pagination order
     )
 
 class Country(Base):
@@ -30,11 +49,13 @@ class Country(Base):
 
     code = Column(String(2), primary_key=True, comment='Two-letter country code (ISO 3166-1 alpha-2)')
     name = Column(String(255), nullable=False, comment='English country name')
+    name_key = Column(String(255), nullable=False, default=_name_key_default,
+                      comment='Normalized name, matched by case-insensitive lookups')
     full_name = Column(String(255), nullable=False, comment='Full English country name')
     iso3 = Column(String(3), nullable=False, comment='Three-letter country code (ISO 3166-1 alpha-3)')
     number = Column(Integer, nullable=False, comment='Three-digit country number (ISO 3166-1 numeric)')
     continent_code = Column(String(2), ForeignKey('continents.code'), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
 
     # Relationship to continent
     continent = relationship("Continent", back_populates="countries")
@@ -42,5 +63,30 @@ class Country(Base):
     # Adding indexes
     __table_args__ = (
         Index('idx_country_name', 'name'),
+        Index('idx_country_name_key', 'name_key'),
         Index('idx_country_continent', 'continent_code'),
-    )
\ No newline at end of file
+        Index('idx_country_iso3', 'iso3', unique=True),
+        Index('idx_country_number', 'number', unique=True),
+        Index('idx_country_updated_code', 'updated_at', 'code'),  # Keyset pagination order
+    )
+
+    @validates('name')
+    def validate_name(self, key, name):
+        self.name_key = normalize_name(name)
+        return name
+
+class Change(Base):
+    """
+    SQLAlchemy model for the 'changes' table.
+    Append-only log of writes to countries and continents, recorded in the same
+    transaction as the write. Deletes are kept as tombstones so clients can sync
+    incrementally.
+    """
+    __tablename__ = 'changes'
+
+    seq = Column(Integer, primary_key=True, autoincrement=True, comment='Monotonic change sequence number')
+    entity = Column(String(16), nullable=False, comment="'country' or 'continent'")
+    code = Column(String(2), nullable=False, comment='Primary key of the changed row')
+    op = Column(String(8), nullable=False, comment="'upsert' or 'delete'")
+    data = Column(JSON, nullable=True, comment='Row contents after an upsert, NULL for a delete')
+    changed_at = Column(Timestamp, server_default=func.now())
@@ -0,0 +1,97 @@
+import gzip
+import json
+from typing import Callable, Hashable, Sequence
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+
+from app.crud.snapshot import Snapshot
+
+try:
+    import brotli
+except ImportError:  # Optional dependency: serve gzip only
+    brotli = None
+
+
+def encode_json(content) -> bytes:
+    """
+    Encode plain JSON content the same way Starlette's JSONResponse does.
+    """
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def project(record, fields: Sequence[str]) -> dict:
+    """
+    Return only the given fields of a record (a snapshot record or a row) as a dict.
+    """
+    return {field: getattr(record, field) for field in fields}
+
+
+def encode_content(content) -> bytes:
+    """
+    Encode content that may hold datetimes or dataclasses the way pydantic does,
+    without building or validating a response model.
+    """
+    return to_json(content)
+
+
+def json_response(response: Response, body: bytes, headers: dict = None) -> Response:
+    """
+    Send an already encoded JSON body. Headers already set on the dependency-injected
+    response (ETag, Last-Modified, X-Next-Cursor) are carried over.
+    """
+    merged = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    merged.update(headers or {})
+    return Response(content=body, media_type="application/json", headers=merged)
+
+
+def _negotiate_encoding(accept_encoding: str):
+    """
+    Pick the best precompressed variant the client accepts, or None for identity.
+    Codings are ranked by q-value, br before gzip on ties; "*" stands for any coding
+    not listed, q=0 refuses one, and an explicit identity with a higher q wins.
+    """
+    qvalues = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    wildcard = qvalues.get("*", 0.0)
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(available, key=lambda coding: qvalues.get(coding, wildcard))
+    q = qvalues.get(best, wildcard)
+    if q <= 0 or qvalues.get("identity", 0.0) > q:
+        return None
+    return best
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body)
+    return gzip.compress(body, mtime=0)
+
+
+def pre_encoded_response(request: Request, response: Response, snapshot: Snapshot,
+                         key: Hashable, build: Callable[[], bytes]) -> Response:
+    """
+    Serve a JSON body that is encoded (and compressed) once per snapshot.
+    The bytes are memoized on the snapshot, so any write, which swaps in a new
+    snapshot, invalidates them. Headers already set on the dependency-injected
+    response (ETag, Last-Modified) are carried over.
+    """
+    body = snapshot.memo(key, build)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding:
+        body = snapshot.memo((key, encoding), lambda: _compress(body, encoding))
+        headers["Content-Encoding"] = encoding
+    return json_response(response, body, headers)
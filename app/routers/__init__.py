@@ -1,3 +1,5 @@
 # Import routers to include them in the main app
 from .country_router import router as country_router
-from .continent_router import router as continent_router
\ No newline at end of file
+from .continent_router import router as continent_router
+from .change_router import router as change_router
+from .metrics_router import router as metrics_router
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import ChangeFeedOut
+from app.dependencies import get_db
+from app.crud import get_changes, get_latest_change_seq
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+    responses={410: {"description": "Change feed was reset, full resync required"}},
+)
+
+@router.get("/", response_model=ChangeFeedOut)
+async def read_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    session: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve upserts and delete tombstones for countries and continents made after
+    sequence number since, in commit order (writers serialize their change-feed appends
+    until they commit). Start with since=0, then pass next_since.
+    """
+    latest_seq = await get_latest_change_seq(session)
+    if since > latest_seq:
+        # The log was recreated (e.g. by a full reseed); the client's position is meaningless
+        raise HTTPException(status_code=410, detail="Change feed was reset, full resync required")
+    changes = await get_changes(session, since=since, limit=limit)
+    next_since = changes[-1].seq if changes else since
+    return {"changes": changes, "next_since": next_since, "latest_seq": latest_seq}
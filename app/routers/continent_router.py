@@ -1,21 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, FrozenSet, List, Optional, Sequence, Tuple
 
 from app.database import async_session
 from app.models.models import Continent
-from app.schemas import ContinentCreate, ContinentUpdate, ContinentOut
-from app.dependencies import get_db
+from app.schemas import (
+    ContinentCreate, ContinentUpdate, ContinentOut, ContinentWithCountriesOut, ContinentStatsOut, CountryOut
+)
+from app.dependencies import get_db, get_conditional_snapshot, fields_param, include_param, page_limit
+from app.responses import encode_content, encode_json, json_response, pre_encoded_response, project
 from app.crud import (
-    get_continent_by_code, get_continents, create_continent, update_continent, delete_continent
+    get_continent_by_code, create_continent, update_continent_by_code, delete_continent, Snapshot,
+    decode_cursor, next_cursor
 )
 
+continent_list_adapter = TypeAdapter(List[ContinentOut])
+continent_with_countries_list_adapter = TypeAdapter(List[ContinentWithCountriesOut])
+country_list_adapter = TypeAdapter(List[CountryOut])
+include_countries = include_param("countries")
+continent_fields = fields_param(*ContinentOut.model_fields)
+country_fields = fields_param(*CountryOut.model_fields)
+
 router = APIRouter(
     prefix="/continents",
     tags=["continents"],
     responses={404: {"description": "Not found"}},
 )
 
+def _sparse(continents: Sequence, fields: Tuple[str, ...], include: FrozenSet[str], snapshot: Snapshot) -> List[dict]:
+    """
+    Project continents to the requested fields, embedding each one's countries if asked to.
+    """
+    rows = [project(continent, fields) for continent in continents]
+    if "countries" in include:
+        for row, continent in zip(rows, continents):
+            row["countries"] = snapshot.countries_by_continent.get(continent.code, ())
+    return rows
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get an async database session.
@@ -23,26 +45,108 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
 
-@router.get("/", response_model=List[ContinentOut])
+@router.get("/", response_model=List[ContinentWithCountriesOut], response_model_exclude_unset=True)
 async def read_continents(
-    skip: int = 0,
-    limit: int = 10,
-    session: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Depends(page_limit),
+    include: FrozenSet[str] = Depends(include_countries),
+    fields: Optional[Tuple[str, ...]] = Depends(continent_fields),
+    snapshot: Snapshot = Depends(get_conditional_snapshot)
 ):
     """
-    Retrieve a list of continents with pagination.
+    Retrieve a page of continents ordered by (updated_at, code).
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
+    If limit is set to -1, return all continents.
+    Pass include=countries to embed each continent's countries and fields=code,name
+    to return only those fields.
     """
-    continents = await get_continents(session, skip=skip, limit=limit)
+    if cursor is None and (limit is None or limit > len(snapshot.continents)):
+        # The whole list fits on the first page and is identical for every caller
+        if fields:
+            return pre_encoded_response(
+                request, response, snapshot, ("continents", fields, "countries" in include),
+                lambda: encode_content(_sparse(snapshot.continents_by_update, fields, include, snapshot)),
+            )
+        if "countries" in include:
+            return pre_encoded_response(
+                request, response, snapshot, "continents?include=countries",
+                lambda: continent_with_countries_list_adapter.dump_json(
+                    continent_with_countries_list_adapter.validate_python(
+                        [snapshot.embed_countries(c) for c in snapshot.continents_by_update], from_attributes=True
+                    )
+                ),
+            )
+        return pre_encoded_response(
+            request, response, snapshot, "continents",
+            lambda: continent_list_adapter.dump_json(
+                continent_list_adapter.validate_python(snapshot.continents_by_update, from_attributes=True)
+            ),
+        )
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    continents = snapshot.list_continents(limit=limit, after=after)
+    cursor = next_cursor(continents, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    if fields:
+        return json_response(response, encode_content(_sparse(continents, fields, include, snapshot)))
+    if "countries" in include:
+        return [snapshot.embed_countries(c) for c in continents]
     return continents
 
-@router.get("/{continent_code}", response_model=ContinentOut)
-async def read_continent(continent_code: str, session: AsyncSession = Depends(get_db)):
+@router.get("/stats", response_model=ContinentStatsOut)
+async def read_continent_stats(request: Request, response: Response,
+                               snapshot: Snapshot = Depends(get_conditional_snapshot)):
     """
-    Retrieve a single continent by its code.
+    Retrieve the number of countries and their codes for every continent.
+    """
+    return pre_encoded_response(
+        request, response, snapshot, "continent_stats",
+        lambda: encode_json({
+            "continents": list(snapshot.continent_stats),
+            "total_countries": sum(stats["country_count"] for stats in snapshot.continent_stats),
+        }),
+    )
+
+@router.get("/{continent_code}/countries", response_model=List[CountryOut])
+async def read_continent_countries(continent_code: str, request: Request, response: Response,
+                                   fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                                   snapshot: Snapshot = Depends(get_conditional_snapshot)):
     """
-    continent = await get_continent_by_code(session, continent_code)
+    Retrieve every country of a continent, ordered by code, optionally only the given fields.
+    """
+    if continent_code not in snapshot.continent_by_code:
+        raise HTTPException(status_code=404, detail="Continent not found")
+    countries = snapshot.countries_by_continent.get(continent_code, ())
+    if fields:
+        return pre_encoded_response(
+            request, response, snapshot, ("continent_countries", continent_code, fields),
+            lambda: encode_content([project(country, fields) for country in countries]),
+        )
+    return pre_encoded_response(
+        request, response, snapshot, ("continent_countries", continent_code),
+        lambda: country_list_adapter.dump_json(country_list_adapter.validate_python(countries, from_attributes=True)),
+    )
+
+@router.get("/{continent_code}", response_model=ContinentWithCountriesOut, response_model_exclude_unset=True)
+async def read_continent(continent_code: str, response: Response, include: FrozenSet[str] = Depends(include_countries),
+                         fields: Optional[Tuple[str, ...]] = Depends(continent_fields),
+                         snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve a single continent by its code. Pass fields=code,name to return only those fields.
+    """
+    continent = snapshot.continent_by_code.get(continent_code)
     if not continent:
         raise HTTPException(status_code=404, detail="Continent not found")
+    if fields:
+        return json_response(response, encode_content(_sparse([continent], fields, include, snapshot)[0]))
+    if "countries" in include:
+        return snapshot.embed_countries(continent)
     return continent
 
 @router.post("/", response_model=ContinentOut)
@@ -61,10 +165,9 @@ async def update_existing_continent(continent_code: str, continent_update: Conti
     """
     Update an existing continent.
     """
-    db_continent = await get_continent_by_code(session, continent_code)
-    if not db_continent:
+    updated_continent = await update_continent_by_code(session, continent_code, continent_update)
+    if not updated_continent:
         raise HTTPException(status_code=404, detail="Continent not found")
-    updated_continent = await update_continent(session, db_continent, continent_update)
     return updated_continent
 
 @router.delete("/{continent_code}")
@@ -1,22 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import AsyncGenerator, List, Optional
+import csv
+from dataclasses import asdict
+import io
+import json
+from typing import AsyncGenerator, AsyncIterator, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 from datetime import datetime
 
-from app.database import async_session
+from app.database import async_session, read_session
 from app.models.models import Country
-from app.schemas import CountryCreate, CountryUpdate, CountryOut
-from app.dependencies import get_db
+from app.schemas import (
+    CountryCreate, CountryUpdate, CountryOut, CountryBulkResult, CountryBatchRequest, CountryBatchOut,
+    CountrySuggestion, CountryWithContinentOut, ResolvedName
+)
+from app.dependencies import get_db, get_conditional_snapshot, fields_param, include_param, page_limit, reads_from_primary
+from app.responses import encode_content, encode_json, json_response, pre_encoded_response, project
 from app.crud import (
-    get_country_by_name_cached, get_countries, create_country, update_country, delete_country, get_country_continent_mapping
+    get_country_by_name_cached, create_country, update_country_by_code, delete_country, bulk_upsert_countries,
+    stream_countries, EXPORT_COLUMNS, EXPORT_FIELDS,
+    Snapshot, get_snapshot, decode_cursor, next_cursor
 )
 
+country_list_adapter = TypeAdapter(List[CountryOut])
+country_with_continent_list_adapter = TypeAdapter(List[CountryWithContinentOut])
+include_continent = include_param("continent")
+country_fields = fields_param(*CountryOut.model_fields)
+
 router = APIRouter(
     prefix="/countries",
     tags=["countries"],
     responses={404: {"description": "Not found"}},
 )
 
+def _sparse(countries: Sequence, fields: Tuple[str, ...], include: FrozenSet[str], snapshot: Snapshot) -> List[dict]:
+    """
+    Project countries to the requested fields, embedding each one's continent if asked to.
+    """
+    rows = [project(country, fields) for country in countries]
+    if "continent" in include:
+        for row, country in zip(rows, countries):
+            row["continent"] = snapshot.continent_by_code.get(country.continent_code)
+    return rows
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get an async database session.
@@ -24,33 +52,315 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
 
-@router.get("/", response_model=List[CountryOut])
+@router.get("/", response_model=List[CountryWithContinentOut], response_model_exclude_unset=True)
 async def read_countries(
-    skip: int = 0,
-    limit: Optional[int] = 10,  # Make limit optional
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Depends(page_limit),
     updated_after: Optional[datetime] = Query(None),
-    session: AsyncSession = Depends(get_db)
+    include: FrozenSet[str] = Depends(include_continent),
+    fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+    snapshot: Snapshot = Depends(get_conditional_snapshot)
 ):
     """
-    Retrieve a list of countries with pagination and optional updated_at filtering.
-    If limit is set to -1, return all countries.
+    Retrieve a page of countries ordered by (updated_at, code) with optional updated_at filtering.
+    Pass the X-Next-Cursor response header back as cursor to fetch the next page.
+    If limit is set to -1, return all countries. Pass include=continent to embed each country's continent
+    and fields=code,name to return only those fields.
     """
-    if limit == -1:  # Special case for no limit
-        limit = None
+    if limit is None:  # limit=-1: every country
+        if cursor is None and updated_after is None:
+            # The full listing is identical for every caller: serve pre-encoded bytes
+            if fields:
+                return pre_encoded_response(
+                    request, response, snapshot, ("countries", fields, "continent" in include),
+                    lambda: encode_content(_sparse(snapshot.countries_by_update, fields, include, snapshot)),
+                )
+            if "continent" in include:
+                return pre_encoded_response(
+                    request, response, snapshot, "countries?include=continent",
+                    lambda: country_with_continent_list_adapter.dump_json(
+                        country_with_continent_list_adapter.validate_python(
+                            [snapshot.embed_continent(c) for c in snapshot.countries_by_update], from_attributes=True
+                        )
+                    ),
+                )
+            return pre_encoded_response(
+                request, response, snapshot, "countries",
+                lambda: country_list_adapter.dump_json(
+                    country_list_adapter.validate_python(snapshot.countries_by_update, from_attributes=True)
+                ),
+            )
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    countries = await get_countries(session, skip=skip, limit=limit, updated_after=updated_after)
+    countries = snapshot.list_countries(limit=limit, after=after, updated_after=updated_after)
+    cursor = next_cursor(countries, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    if fields:
+        return json_response(response, encode_content(_sparse(countries, fields, include, snapshot)))
+    if "continent" in include:
+        return [snapshot.embed_continent(c) for c in countries]
     return countries
 
 
-@router.get("/{country_code}", response_model=CountryOut)
-async def read_country(country_code: str, session: AsyncSession = Depends(get_db)):
+@router.post("/bulk", response_model=List[CountryBulkResult])
+async def create_countries_bulk(countries: List[CountryCreate], session: AsyncSession = Depends(get_db)):
+    """
+    Create many countries at once. Existing countries are left unchanged and reported as "exists".
+    """
+    return await _bulk_upsert(session, countries, update_existing=False)
+
+@router.put("/bulk", response_model=List[CountryBulkResult])
+async def upsert_countries_bulk(countries: List[CountryCreate], session: AsyncSession = Depends(get_db)):
+    """
+    Create or fully replace many countries at once.
+    """
+    return await _bulk_upsert(session, countries, update_existing=True)
+
+async def _bulk_upsert(session: AsyncSession, countries: List[CountryCreate], update_existing: bool) -> List[dict]:
+    try:
+        return await bulk_upsert_countries(session, countries, update_existing=update_existing)
+    except IntegrityError:
+        # Conflicts with the table are reported per row; this one appeared after the check
+        raise HTTPException(status_code=409, detail="A concurrent write conflicts with this request; nothing was written, retry it")
+
+MAX_BATCH_CODES = 1000  # Distinct codes per batch lookup
+
+def _batch(codes: Iterable[str], include: FrozenSet[str], snapshot: Snapshot,
+           fields: Optional[Tuple[str, ...]], response: Response):
+    codes = list(dict.fromkeys(code.strip().upper() for code in codes if code.strip()))
+    if len(codes) > MAX_BATCH_CODES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CODES} codes per request")
+    found, missing = snapshot.get_countries_by_codes(codes)
+    if fields:
+        return json_response(response, encode_content(
+            {"countries": _sparse(found, fields, include, snapshot), "missing": missing}))
+    if "continent" in include:
+        found = [snapshot.embed_continent(c) for c in found]
+    return {"countries": found, "missing": missing}
+
+@router.get("/batch", response_model=CountryBatchOut, response_model_exclude_unset=True)
+async def read_countries_batch(response: Response,
+                               codes: str = Query(..., description="Comma-separated country codes"),
+                               include: FrozenSet[str] = Depends(include_continent),
+                               fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                               snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve many countries by code in one request, e.g. ?codes=US,FR. Codes are
+    case-insensitive; ones that do not exist are returned, uppercased, in the missing list.
+    """
+    return _batch(codes.split(","), include, snapshot, fields, response)
+
+@router.post("/batch", response_model=CountryBatchOut, response_model_exclude_unset=True)
+async def read_countries_batch_post(batch: CountryBatchRequest, response: Response,
+                                    include: FrozenSet[str] = Depends(include_continent),
+                                    fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                                    snapshot: Snapshot = Depends(get_snapshot)):
+    """
+    Retrieve many countries by code in one request, for code lists too long for a query string.
+    """
+    return _batch(batch.codes, include, snapshot, fields, response)
+
+RESOLVE_CHUNK_SIZE = 10000  # NDJSON lines resolved per pass
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+def _resolved_fragments(snapshot: Snapshot) -> dict:
+    """
+    Encoded "code", "continent_code" and "continent" members per country code, built once per snapshot.
+    """
+    def build():
+        fragments = {None: '"code":null,"continent_code":null,"continent":null'}
+        for country in snapshot.countries:
+            continent = snapshot.continent_by_code.get(country.continent_code)
+            fragments[country.code] = encode_json({
+                "code": country.code,
+                "continent_code": country.continent_code,
+                "continent": continent.name if continent else None,
+            }).decode()[1:-1]
+        return fragments
+    return snapshot.memo("resolved_name_fragments", build)
+
+def _encode_resolved(snapshot: Snapshot, names: List[str]) -> List[str]:
+    fragments = _resolved_fragments(snapshot)
+    # Names are echoed with non-ASCII escaped, so a lone surrogate from a "\ud800" escape stays encodable
+    return [
+        f'{{"name":{json.dumps(name)},{fragments[country.code if country else None]}}}'
+        for name, country in zip(names, snapshot.resolve_names(names))
+    ]
+
+async def _resolve_ndjson(body: AsyncIterator[bytes], snapshot: Snapshot) -> List[str]:
+    """
+    Resolve an NDJSON body as it arrives, RESOLVE_CHUNK_SIZE lines per pass.
+    Each line is a JSON string or an object with a "name" member; blank lines are skipped.
+    """
+    output: List[str] = []
+    names: List[str] = []
+    line_number = 0
+
+    def flush():
+        output.extend(line + "\n" for line in _encode_resolved(snapshot, names))
+        names.clear()
+
+    def take(lines: List[bytes]):
+        nonlocal line_number
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError:
+                value = None
+            name = value.get("name") if isinstance(value, dict) else value
+            if not isinstance(name, str):
+                raise HTTPException(status_code=400,
+                                    detail=f"Line {line_number}: expected a name or an object with a name")
+            names.append(name)
+            if len(names) >= RESOLVE_CHUNK_SIZE:
+                flush()
+
+    pending = b""
+    async for chunk in body:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        take(lines)
+    take([pending])
+    flush()
+    return output
+
+@router.post("/resolve-names", response_model=List[ResolvedName])
+async def resolve_country_names(request: Request, snapshot: Snapshot = Depends(get_snapshot)):
+    """
+    Resolve many free-text country names to their country code and continent.
+    Send a JSON array of names, or NDJSON (Content-Type: application/x-ndjson) with one
+    name or {"name": ...} object per line, which is read as it arrives. The response
+    uses the same format and has one result per input name, in order.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        lines = await _resolve_ndjson(request.stream(), snapshot)
+        return Response(content="".join(lines).encode(), media_type="application/x-ndjson")
+    try:
+        names = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of names")
+    return Response(content=f"[{','.join(_encode_resolved(snapshot, names))}]".encode(), media_type="application/json")
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+async def _export_rows(format: str, primary: bool = False,
+                       fields: Optional[Tuple[str, ...]] = None) -> AsyncGenerator[str, None]:
     """
-    Retrieve a single country by its code.
+    Encode countries as NDJSON or CSV, one chunk per fetched batch.
+    Only the requested fields are selected. Uses its own session because the
+    response outlives the request handler.
+    """
+    fields = fields or tuple(column.key for column in EXPORT_COLUMNS)
+    async with read_session(primary=primary) as session:
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            # Send the header on its own so an empty table still yields a valid CSV
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            async for rows in stream_countries(session, fields=fields):
+                writer.writerows([_csv_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        else:
+            async for rows in stream_countries(session, fields=fields):
+                yield "".join(
+                    json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=datetime.isoformat) + "\n"
+                    for row in rows
+                )
+
+@router.get("/export")
+async def export_countries(request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                           fields: Optional[Tuple[str, ...]] = Depends(fields_param(*EXPORT_FIELDS))):
     """
-    result = await session.get(Country, country_code)
-    if not result:
+    Stream every country as NDJSON (one object per line) or CSV, optionally only the given fields.
+    Rows are sent as they are read from the database instead of being loaded first.
+    """
+    if format == "csv":
+        media_type, filename = "text/csv", "countries.csv"
+    else:
+        media_type, filename = "application/x-ndjson", "countries.ndjson"
+    return StreamingResponse(
+        _export_rows(format, primary=reads_from_primary(request), fields=fields),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/suggest", response_model=List[CountrySuggestion])
+async def suggest_countries(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50),
+                            snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Autocomplete countries by name, full name, ISO codes or common alternate spelling.
+    Matching is case- and accent-insensitive, tolerates small typos and is ranked best first.
+    """
+    return [
+        {**asdict(snapshot.country_by_code[code]), "matched": matched, "score": score}
+        for code, matched, score in snapshot.suggest_index.suggest(q, limit)
+    ]
+
+def _country_or_404(country, include: FrozenSet[str], snapshot: Snapshot,
+                    fields: Optional[Tuple[str, ...]], response: Response):
+    if not country:
         raise HTTPException(status_code=404, detail="Country not found")
-    return result
+    if fields:
+        return json_response(response, encode_content(_sparse([country], fields, include, snapshot)[0]))
+    if "continent" in include:
+        return snapshot.embed_continent(country)
+    return country
+
+@router.get("/iso3/{iso3}", response_model=CountryWithContinentOut, response_model_exclude_unset=True)
+async def read_country_by_iso3(iso3: str, response: Response, include: FrozenSet[str] = Depends(include_continent),
+                               fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                               snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve a single country by its ISO 3166-1 alpha-3 code, e.g. FRA.
+    """
+    return _country_or_404(snapshot.country_by_iso3.get(iso3.upper()), include, snapshot, fields, response)
+
+@router.get("/numeric/{number}", response_model=CountryWithContinentOut, response_model_exclude_unset=True)
+async def read_country_by_number(number: int, response: Response, include: FrozenSet[str] = Depends(include_continent),
+                                 fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                                 snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve a single country by its ISO 3166-1 numeric code, e.g. 250 or 040.
+    """
+    return _country_or_404(snapshot.country_by_number.get(number), include, snapshot, fields, response)
+
+@router.get("/resolve/{any_code}", response_model=CountryWithContinentOut, response_model_exclude_unset=True)
+async def resolve_country(any_code: str, response: Response, include: FrozenSet[str] = Depends(include_continent),
+                          fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                          snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve a single country by any of its codes: alpha-2 (FR), alpha-3 (FRA) or numeric (250).
+    """
+    return _country_or_404(snapshot.resolve_country(any_code), include, snapshot, fields, response)
+
+@router.get("/{country_code}", response_model=CountryWithContinentOut, response_model_exclude_unset=True)
+async def read_country(country_code: str, response: Response, include: FrozenSet[str] = Depends(include_continent),
+                       fields: Optional[Tuple[str, ...]] = Depends(country_fields),
+                       snapshot: Snapshot = Depends(get_conditional_snapshot)):
+    """
+    Retrieve a single country by its code. Pass fields=code,name to return only those fields.
+    """
+    return _country_or_404(snapshot.country_by_code.get(country_code), include, snapshot, fields, response)
 
 @router.post("/", response_model=CountryOut)
 async def create_new_country(country: CountryCreate, session: AsyncSession = Depends(get_db)):
@@ -60,7 +370,10 @@ async def create_new_country(country: CountryCreate, session: AsyncSession = Dep
     existing_country = await session.get(Country, country.code)
     if existing_country:
         raise HTTPException(status_code=400, detail="Country already exists")
-    new_country = await create_country(session, country)
+    try:
+        new_country = await create_country(session, country)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="iso3 or number already used by another country")
     return new_country
 
 @router.put("/{country_code}", response_model=CountryOut)
@@ -68,10 +381,12 @@ async def update_existing_country(country_code: str, country_update: CountryUpda
     """
     Update an existing country.
     """
-    db_country = await session.get(Country, country_code)
-    if not db_country:
+    try:
+        updated_country = await update_country_by_code(session, country_code, country_update)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="iso3 or number already used by another country")
+    if not updated_country:
         raise HTTPException(status_code=404, detail="Country not found")
-    updated_country = await update_country(session, db_country, country_update)
     return updated_country
 
 @router.delete("/{country_code}")
@@ -85,22 +400,29 @@ async def delete_existing_country(country_code: str, session: AsyncSession = Dep
     await delete_country(session, db_country)
     return {"detail": "Country deleted"}
 
-@router.get("/search/{country_name}", response_model=CountryOut)
-async def search_country_by_name(country_name: str, session: AsyncSession = Depends(get_db)):
+@router.get("/search/{country_name}", response_model=CountryWithContinentOut, response_model_exclude_unset=True)
+async def search_country_by_name(country_name: str, session: AsyncSession = Depends(get_db),
+                                 include: FrozenSet[str] = Depends(include_continent),
+                                 snapshot: Snapshot = Depends(get_conditional_snapshot)):
     """
-    Search for a country by name and return its details including continent.
+    Search for a country by name (case-insensitive) and return its details.
     """
     country = await get_country_by_name_cached(session, country_name)
     if not country:
         raise HTTPException(status_code=404, detail="Country not found")
+    if "continent" in include:
+        return snapshot.embed_continent(country)
     return country
 
 @router.get("/continents/", response_model=dict)
-async def get_country_continent_mapping_api(session: AsyncSession = Depends(get_db)):
+async def get_country_continent_mapping_api(request: Request, response: Response,
+                                            snapshot: Snapshot = Depends(get_conditional_snapshot)):
     """
     Retrieve a dictionary mapping each country name to its corresponding continent name.
+    The encoded mapping is built once per snapshot.
     """
-    mapping = await get_country_continent_mapping(session)
+    mapping = snapshot.country_continent_mapping
     if not mapping:
         raise HTTPException(status_code=404, detail="No countries or continents found")
-    return mapping
+    return pre_encoded_response(request, response, snapshot, "country_continent_mapping",
+                                lambda: encode_json(dict(mapping)))
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import render
+
+router = APIRouter(
+    tags=["monitoring"],
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Expose request latency, database and cache metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
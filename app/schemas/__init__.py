@@ -1,5 +1,8 @@
 # This file makes it easier to import schemas elsewhere in the project
 from .schemas import (
-    CountryBase, CountryCreate, CountryUpdate, CountryOut,
-    ContinentBase, ContinentCreate, ContinentUpdate, ContinentOut
+    CountryBase, CountryCreate, CountryUpdate, CountryOut, CountryBulkResult,
+    CountryBatchRequest, CountryBatchOut, CountrySuggestion, ResolvedName,
+    ContinentBase, ContinentCreate, ContinentUpdate, ContinentOut,
+    CountryWithContinentOut, ContinentWithCountriesOut, ContinentStats, ContinentStatsOut,
+    ChangeOut, ChangeFeedOut
 )
@@ -1,7 +1,7 @@
 # app/schemas/schemas.py
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class CountryBase(BaseModel):
@@ -41,6 +41,44 @@ class CountryOut(CountryBase):
     class Config:
         from_attributes = True  # Updated for Pydantic v2
 
+class CountryBulkResult(BaseModel):
+    """
+    Schema for the outcome of a single row in a bulk create/upsert request.
+    Status is one of "created", "updated", "exists" or "error".
+    """
+    code: str
+    status: str
+    detail: Optional[str] = None
+
+class CountryBatchRequest(BaseModel):
+    """
+    Schema for looking up many countries by code in one request.
+    """
+    codes: List[str]
+
+class CountryBatchOut(BaseModel):
+    """
+    Schema for a batch lookup result: the countries found and the codes that were not.
+    """
+    countries: List["CountryWithContinentOut"]
+    missing: List[str]
+
+class CountrySuggestion(CountryOut):
+    """
+    Schema for an autocomplete result: the country plus the term it matched and its rank score.
+    """
+    matched: str
+    score: float
+
+class ResolvedName(BaseModel):
+    """
+    Schema for one result of bulk name resolution; the fields are null when the name did not match.
+    """
+    name: str
+    code: Optional[str] = None
+    continent_code: Optional[str] = None
+    continent: Optional[str] = None
+
 class ContinentBase(BaseModel):
     """
     Base schema for Continent, containing fields common to all schemas.
@@ -68,3 +106,57 @@ class ContinentOut(ContinentBase):
 
     class Config:
         from_attributes = True  # Updated for Pydantic v2
+
+class CountryWithContinentOut(CountryOut):
+    """
+    Schema for returning a Country with its Continent embedded (?include=continent).
+    """
+    continent: Optional[ContinentOut] = None
+
+class ContinentWithCountriesOut(ContinentOut):
+    """
+    Schema for returning a Continent with its Countries embedded (?include=countries).
+    """
+    countries: Optional[List[CountryOut]] = None
+
+class ContinentStats(BaseModel):
+    """
+    Schema for the country count and country codes of one continent.
+    """
+    code: str
+    name: str
+    country_count: int
+    country_codes: List[str]
+
+class ContinentStatsOut(BaseModel):
+    """
+    Schema for per-continent aggregates, ordered by continent code.
+    """
+    continents: List[ContinentStats]
+    total_countries: int
+
+class ChangeOut(BaseModel):
+    """
+    Schema for a single change-feed entry.
+    op is "upsert" (data holds the row) or "delete" (a tombstone, data is null).
+    """
+    seq: int
+    entity: str
+    code: str
+    op: str
+    data: Optional[Dict[str, Any]] = None
+    changed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ChangeFeedOut(BaseModel):
+    """
+    Schema for a page of the change feed.
+    Pass next_since back as since to continue; latest_seq is the newest change overall.
+    """
+    changes: List[ChangeOut]
+    next_since: int
+    latest_seq: int
+
+CountryBatchOut.model_rebuild()
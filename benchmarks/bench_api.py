@@ -0,0 +1,262 @@
+"""
+Endpoint benchmark suite.
+
+Seeds a throwaway database with the vendored country data (scaled up with
+synthetic rows), drives every router endpoint in-process through
+httpx's ASGI transport at a fixed concurrency, and reports p50/p95/p99 latency
+and throughput per endpoint. Results are written as JSON and can be compared
+against a saved baseline; the run fails if any endpoint regresses beyond the
+threshold.
+
+    python -m benchmarks.bench_api --requests 500 --concurrency 16
+    python -m benchmarks.bench_api --save-baseline benchmarks/results/baseline.json
+    python -m benchmarks.bench_api --baseline benchmarks/results/baseline.json --threshold 0.25
+
+Pass --database-url postgresql+asyncpg://... to benchmark against a local Postgres
+(the tables in that database are dropped and recreated).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+CONTINENTS = [
+    ("AF", "Africa"), ("AN", "Antarctica"), ("AS", "Asia"), ("EU", "Europe"),
+    ("NA", "North America"), ("OC", "Oceania"), ("SA", "South America"),
+]
+
+
+def synthetic_countries(count: int, seed: int = 42, exclude=()) -> List[dict]:
+    """
+    Generate deterministic synthetic country rows whose codes are not in exclude.
+    Codes are two characters wide, so at most 36 * 36 codes exist.
+    """
+    alphabet = string.ascii_uppercase + string.digits
+    codes = [a + b for a in alphabet for b in alphabet if a + b not in exclude]
+    if count > len(codes):
+        raise ValueError(f"At most {len(codes)} synthetic countries can be generated")
+    rng = random.Random(seed)
+    rows = []
+    for number, code in enumerate(codes[:count], start=1000):
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))).capitalize()
+        rows.append({
+            "code": code,
+            "name": f"{name} {code}",
+            "full_name": f"Republic of {name} {code}",
+            "iso3": f"{code}X",
+            "number": number,
+            "continent_code": rng.choice(CONTINENTS)[0],
+        })
+    return rows
+
+
+def dataset(count: int) -> Dict[str, List[dict]]:
+    """
+    Return the vendored seed data, scaled up to count countries with synthetic rows.
+    """
+    from app.initial_data import DATA_FILE, collect_rows
+
+    rows = collect_rows(DATA_FILE.read_text(encoding="utf-8"))
+    real = rows["countries"]
+    rows["countries"] = real[:count] + synthetic_countries(
+        max(count - len(real), 0), exclude={row["code"] for row in real})
+    return rows
+
+
+async def seed_database(rows: Dict[str, List[dict]]):
+    """
+    Recreate the schema and load the rows through the release seeding pipeline.
+    """
+    from app.database import Base, engine
+    from app.initial_data import seed
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await seed(rows)
+
+
+def endpoints(rows: List[dict]) -> List[Tuple[str, Callable]]:
+    """
+    Return (name, request factory) pairs. Each factory takes the client and a
+    random generator and performs one request.
+    """
+    codes = [row["code"] for row in rows]
+    names = [row["name"] for row in rows]
+    iso3s = [row["iso3"] for row in rows]
+    numbers = [row["number"] for row in rows]
+    batch = ",".join(codes[:50])
+
+    def get(path_fn):
+        return lambda client, rng: client.get(path_fn(rng))
+
+    return [
+        ("GET /", get(lambda rng: "/")),
+        ("GET /countries/", get(lambda rng: "/countries/?limit=50")),
+        ("GET /countries/?limit=-1", get(lambda rng: "/countries/?limit=-1")),
+        ("GET /countries/?limit=-1&fields", get(lambda rng: "/countries/?limit=-1&fields=code,name")),
+        ("GET /countries/?fields", get(lambda rng: "/countries/?limit=50&fields=code,name")),
+        ("GET /countries/{code}", get(lambda rng: f"/countries/{rng.choice(codes)}")),
+        ("GET /countries/iso3/{iso3}", get(lambda rng: f"/countries/iso3/{rng.choice(iso3s)}")),
+        ("GET /countries/numeric/{number}", get(lambda rng: f"/countries/numeric/{rng.choice(numbers)}")),
+        ("GET /countries/resolve/{any_code}", get(lambda rng: f"/countries/resolve/{rng.choice(iso3s + codes)}")),
+        ("GET /countries/search/{name}", get(lambda rng: f"/countries/search/{rng.choice(names)}")),
+        ("GET /countries/continents/", get(lambda rng: "/countries/continents/")),
+        ("GET /countries/batch", get(lambda rng: f"/countries/batch?codes={batch}")),
+        ("POST /countries/batch", lambda client, rng: client.post("/countries/batch", json={"codes": codes[:200]})),
+        ("POST /countries/resolve-names", lambda client, rng: client.post(
+            "/countries/resolve-names", json=[name.upper() for name in rng.choices(names, k=1000)])),
+        ("GET /countries/suggest", get(lambda rng: f"/countries/suggest?q={rng.choice(names)[:3]}")),
+        ("GET /countries/export", get(lambda rng: "/countries/export")),
+        ("GET /continents/", get(lambda rng: "/continents/")),
+        ("GET /continents/{code}", get(lambda rng: f"/continents/{rng.choice(CONTINENTS)[0]}")),
+        ("GET /continents/stats", get(lambda rng: "/continents/stats")),
+        ("GET /continents/{code}/countries", get(lambda rng: f"/continents/{rng.choice(CONTINENTS)[0]}/countries")),
+        ("GET /changes/", get(lambda rng: "/changes/?limit=100")),
+        ("PUT /countries/{code}", lambda client, rng: client.put(
+            f"/countries/{rng.choice(codes)}", json={"full_name": f"Benchmark {rng.random()}"})),
+        ("PUT /countries/bulk", lambda client, rng: client.put("/countries/bulk", json=rng.sample(rows, 100))),
+    ]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_endpoint(client, request: Callable, total: int, concurrency: int, seed: int) -> Dict:
+    """
+    Issue total requests with at most concurrency in flight and summarize latencies.
+    """
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await request(client, rng)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_rps": total / elapsed,
+    }
+
+
+async def run(args) -> Dict:
+    data = dataset(args.countries)
+    await seed_database(data)
+    rows = data["countries"]
+
+    import httpx
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, request in endpoints(rows):
+                if args.only and args.only not in name:
+                    continue
+                await run_endpoint(client, request, args.warmup, args.concurrency, args.seed)
+                results[name] = await run_endpoint(client, request, args.requests, args.concurrency, args.seed)
+                stats = results[name]
+                print(f"{name:<34} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                      f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:9.1f} req/s"
+                      + (f"  errors {stats['errors']}" if stats["errors"] else ""))
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Return a description of every endpoint whose p95 latency regressed by more than
+    threshold (a fraction) and by more than min_delta_ms in absolute terms.
+    """
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        limit = before["p95_ms"] * (1 + threshold)
+        if stats["p95_ms"] > limit and stats["p95_ms"] - before["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {stats['p95_ms']:.2f} ms vs baseline {before['p95_ms']:.2f} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Country-Continent API endpoints.")
+    parser.add_argument("--database-url", help="Database to seed and benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--countries", type=int, default=1000, help="Number of countries to seed (vendored data, then synthetic rows)")
+    parser.add_argument("--requests", type=int, default=300, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=30, help="Unmeasured warm-up requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per endpoint")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for request parameters")
+    parser.add_argument("--only", help="Only run endpoints whose name contains this text")
+    parser.add_argument("--output", default="benchmarks/results/latest.json", help="Where to write the results")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--baseline", help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed fractional p95 regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore regressions smaller than this")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    tmpdir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    sys.path.insert(0, os.path.abspath("."))
+
+    results = asyncio.run(run(args))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "settings": {k: getattr(args, k) for k in ("countries", "requests", "warmup", "concurrency", "seed")},
+        "endpoints": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    if tmpdir:
+        tmpdir.cleanup()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            print("Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
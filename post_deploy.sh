@@ -6,6 +6,16 @@ echo "Python version: $(python --version)"
 echo "Pip version: $(pip --version)"
 echo "Current user: $(whoami)"
 
+echo "Running database migrations..."
+python -m app.migrate
+
+if [ $? -eq 0 ]; then
+    echo "Database migrations completed successfully."
+else
+    echo "Error: Database migrations failed."
+    exit 1
+fi
+
 echo "Running database initialization script..."
 python -m app.initial_data
 
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway database before app.database creates its engine
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmpdir.name}/test.db"
+for name in ("DATABASE_READ_URLS", "SNAPSHOT_SHARED_PATH", "WRITE_COALESCE_MS"):
+    os.environ.pop(name, None)
+os.environ["CACHE_BACKEND"] = "local"
+
+sys.path.append(os.path.abspath('.'))
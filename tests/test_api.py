@@ -1,24 +1,50 @@
+import asyncio
+import gzip
+import json
 import sys
 import os
 
 import pytest
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 
 sys.path.append(os.path.abspath('.'))
 from app.main import app
-from app.database import Base, engine
+from app import database, dependencies
+from app.database import Base, engine, read_session
+from app.models.models import Continent, Country
+from app.crud import (
+    country_cache, get_changes, get_country_by_name_cached, get_latest_change_seq, prime_statement_cache, refresh_snapshot
+)
+from app.crud.cache import RedisCache
+from app.crud.writes import lock_change_log, log_change
+from app.initial_data import seed
 
 # Create a new AsyncSession for testing
 TestingSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+CONTINENTS = [
+    {"code": "AF", "name": "Africa"}, {"code": "AN", "name": "Antarctica"}, {"code": "AS", "name": "Asia"},
+    {"code": "EU", "name": "Europe"}, {"code": "NA", "name": "North America"}, {"code": "OC", "name": "Oceania"},
+    {"code": "SA", "name": "South America"},
+]
+COUNTRIES = [
+    {"code": "FR", "name": "France", "full_name": "French Republic", "iso3": "FRA", "number": 250, "continent_code": "EU"},
+    {"code": "DE", "name": "Germany", "full_name": "Federal Republic of Germany", "iso3": "DEU", "number": 276, "continent_code": "EU"},
+    {"code": "US", "name": "United States", "full_name": "United States of America", "iso3": "USA", "number": 840, "continent_code": "NA"},
+    {"code": "JP", "name": "Japan", "full_name": "Japan", "iso3": "JPN", "number": 392, "continent_code": "AS"},
+    {"code": "KE", "name": "Kenya", "full_name": "Republic of Kenya", "iso3": "KEN", "number": 404, "continent_code": "AF"},
+]
+
 @pytest.fixture(scope="module")
 async def async_client():
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         yield client
 
 @pytest.fixture(scope="module", autouse=True)
@@ -26,8 +52,628 @@ async def setup_database():
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await seed({"continents": CONTINENTS, "countries": COUNTRIES})
+    await country_cache.clear()
+    await refresh_snapshot()
     yield
     # Drop tables after tests
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+
+async def test_search_caches_unknown_names(async_client):
+    response = await async_client.get("/countries/search/Atlantis")
+    assert response.status_code == 404
+    hits = country_cache.hits
+    response = await async_client.get("/countries/search/atlantis")
+    assert response.status_code == 404
+    assert country_cache.hits == hits + 1
+
+
+async def test_search_sees_created_updated_and_deleted_countries(async_client):
+    assert (await async_client.get("/countries/search/Freedonia")).status_code == 404
+
+    country = {"code": "FD", "name": "Freedonia", "full_name": "Republic of Freedonia",
+               "iso3": "FDN", "number": 901, "continent_code": "EU"}
+    assert (await async_client.post("/countries/", json=country)).status_code == 200
+    response = await async_client.get("/countries/search/Freedonia")
+    assert response.status_code == 200
+    assert response.json()["code"] == "FD"
+
+    response = await async_client.put("/countries/FD", json={"name": "Sylvania"})
+    assert response.status_code == 200
+    assert (await async_client.get("/countries/search/Freedonia")).status_code == 404
+    assert (await async_client.get("/countries/search/Sylvania")).json()["code"] == "FD"
+
+    assert (await async_client.delete("/countries/FD")).status_code == 200
+    assert (await async_client.get("/countries/search/Sylvania")).status_code == 404
+
+
+async def test_search_matches_non_ascii_names_case_insensitively(async_client):
+    aland = {"code": "AX", "name": "Åland Islands", "full_name": "Åland Islands",
+             "iso3": "ALA", "number": 248, "continent_code": "EU"}
+    # Bulk upserts insert through Core, single-row writes through the ORM
+    assert (await async_client.post("/countries/bulk", json=[aland])).status_code == 200
+    for name in ("Åland Islands", "ÅLAND  islands"):
+        response = await async_client.get(f"/countries/search/{name}")
+        assert response.status_code == 200
+        assert response.json()["code"] == "AX"
+
+    assert (await async_client.put("/countries/AX", json={"name": "Ålandsöarna"})).status_code == 200
+    assert (await async_client.get("/countries/search/ÅLANDSÖARNA")).json()["code"] == "AX"
+    assert (await async_client.get("/countries/search/Åland Islands")).status_code == 404
+    assert (await async_client.delete("/countries/AX")).status_code == 200
+
+
+async def test_writes_and_reads_survive_a_down_redis(async_client, monkeypatch):
+    class DownRedis:
+        async def _refuse(self, *args, **kwargs):
+            raise ConnectionError("Connection refused")
+
+        get = set = delete = publish = _refuse
+
+    monkeypatch.setattr(sys.modules["app.crud.crud"], "country_cache", RedisCache("test", client=DownRedis()))
+
+    response = await async_client.put("/countries/FR", json={"full_name": "The French Republic"})
+    assert response.status_code == 200
+    # The write committed and the snapshot was rebuilt despite the failed invalidation
+    assert (await async_client.get("/countries/FR")).json()["full_name"] == "The French Republic"
+    response = await async_client.get("/countries/search/France")
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "The French Republic"
+    assert (await async_client.put("/countries/FR", json={"full_name": "French Republic"})).status_code == 200
+
+
+def _country(code, iso3, number, continent_code="EU", **fields):
+    return {"code": code, "name": f"Country {code}", "full_name": f"Republic of {code}",
+            "iso3": iso3, "number": number, "continent_code": continent_code, **fields}
+
+
+async def _changes_since(since):
+    async with TestingSessionLocal() as session:
+        return [(c.code, c.op, c.data) for c in await get_changes(session, since=since)]
+
+
+async def _latest_seq():
+    async with TestingSessionLocal() as session:
+        return await get_latest_change_seq(session)
+
+
+async def test_bulk_create_leaves_existing_rows_and_upsert_replaces_them(async_client):
+    since = await _latest_seq()
+    payload = [_country("FR", "FRA", 250, full_name="Changed"), _country("QA", "QAA", 901)]
+    response = await async_client.post("/countries/bulk", json=payload)
+    assert response.status_code == 200
+    assert [(r["code"], r["status"]) for r in response.json()] == [("FR", "exists"), ("QA", "created")]
+    assert (await async_client.get("/countries/FR")).json()["full_name"] == "French Republic"
+    assert await _changes_since(since) == [("QA", "upsert", payload[1])]
+
+    since = await _latest_seq()
+    payload = [_country("QA", "QAA", 901, full_name="Replaced"), _country("QB", "QBB", 902)]
+    response = await async_client.put("/countries/bulk", json=payload)
+    assert [(r["code"], r["status"]) for r in response.json()] == [("QA", "updated"), ("QB", "created")]
+    assert (await async_client.get("/countries/QA")).json()["full_name"] == "Replaced"
+    assert (await async_client.get("/countries/search/Country QB")).json()["code"] == "QB"
+    assert await _changes_since(since) == [("QA", "upsert", payload[0]), ("QB", "upsert", payload[1])]
+
+    for code in ("QA", "QB"):
+        assert (await async_client.delete(f"/countries/{code}")).status_code == 200
+
+
+async def test_bulk_rejects_rows_that_would_fail_the_write(async_client):
+    since = await _latest_seq()
+    payload = [
+        _country("QA", "QAA", 901),
+        _country("QA", "QAB", 902),                        # duplicate code
+        _country("QC", "QCC", 903, continent_code="XX"),   # unknown continent
+        _country("QD", "FRA", 904),                        # iso3 held by FR
+        _country("QE", "QEE", 250),                        # number held by FR
+        _country("QF", "QAA", 906),                        # iso3 taken earlier in the request
+        # Swapping iso3 between two countries needs two requests
+        _country("DE", "JPN", 276, name="Germany", full_name="Federal Republic of Germany"),
+        _country("JP", "DEU", 392, continent_code="AS", name="Japan", full_name="Japan"),
+    ]
+    response = await async_client.put("/countries/bulk", json=payload)
+    assert response.status_code == 200
+    report = response.json()
+    assert [r["status"] for r in report] == ["created"] + ["error"] * 7
+    assert report[1]["detail"] == "Duplicate code in request"
+    assert report[2]["detail"] == "Unknown continent code"
+    assert report[3]["detail"] == report[5]["detail"] == "iso3 already used by another country"
+    assert report[4]["detail"] == "number already used by another country"
+    assert "held by JP, which this request also writes" in report[6]["detail"]
+    assert "held by DE, which this request also writes" in report[7]["detail"]
+
+    assert (await async_client.get("/countries/DE")).json()["iso3"] == "DEU"
+    assert [code for code, _, _ in await _changes_since(since)] == ["QA"]
+    assert (await async_client.delete("/countries/QA")).status_code == 200
+
+
+async def test_bulk_writes_every_chunk_in_one_transaction(async_client, monkeypatch):
+    monkeypatch.setattr(sys.modules["app.crud.crud"], "BULK_CHUNK_SIZE", 2)
+    since = await _latest_seq()
+    payload = [_country(f"Q{i}", f"Q{i}Q", 910 + i) for i in range(5)]
+    response = await async_client.put("/countries/bulk", json=payload)
+    assert [(r["code"], r["status"]) for r in response.json()] == [(f"Q{i}", "created") for i in range(5)]
+    found = (await async_client.get("/countries/batch", params={"codes": ",".join(c["code"] for c in payload)})).json()
+    assert found["missing"] == [] and len(found["countries"]) == 5
+    assert [code for code, _, _ in await _changes_since(since)] == [f"Q{i}" for i in range(5)]
+    for country in payload:
+        assert (await async_client.delete(f"/countries/{country['code']}")).status_code == 200
+
+
+async def test_bulk_conflict_found_at_write_time_is_a_409(async_client, monkeypatch):
+    async def conflict(*args, **kwargs):
+        raise IntegrityError("INSERT INTO countries", {}, Exception("UNIQUE constraint failed: countries.iso3"))
+
+    monkeypatch.setattr(sys.modules["app.routers.country_router"], "bulk_upsert_countries", conflict)
+    for method in ("post", "put"):
+        response = await async_client.request(method, "/countries/bulk", json=[_country("QA", "QAA", 901)])
+        assert response.status_code == 409
+
+
+async def _walk(async_client, path, limit):
+    """
+    Follow X-Next-Cursor from the first page to the last and return every code seen.
+    """
+    codes, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await async_client.get(path, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        codes += [row["code"] for row in page]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return codes
+
+
+@pytest.mark.parametrize("path", ["/countries/", "/continents/"])
+async def test_cursor_paging_visits_every_row_once(async_client, path):
+    everything = [row["code"] for row in (await async_client.get(path, params={"limit": -1})).json()]
+    assert "x-next-cursor" not in (await async_client.get(path, params={"limit": -1})).headers
+    for limit in (1, 2, 3, 100):
+        assert await _walk(async_client, path, limit) == everything
+
+
+@pytest.mark.parametrize("path", ["/countries/", "/continents/"])
+@pytest.mark.parametrize("limit", [0, -2])
+async def test_invalid_limits_are_rejected(async_client, path, limit):
+    response = await async_client.get(path, params={"limit": limit})
+    assert response.status_code == 400
+
+
+async def _last_modified(async_client, path):
+    """
+    Return the Last-Modified date of path, waiting out the snapshot's first second.
+    """
+    for _ in range(3):
+        response = await async_client.get(path)
+        if "last-modified" in response.headers:
+            return response.headers["last-modified"]
+        await asyncio.sleep(0.5)
+    raise AssertionError("no Last-Modified header")
+
+
+async def test_if_modified_since_sees_deletes(async_client):
+    country = {"code": "TV", "name": "Tuvalu", "full_name": "Tuvalu",
+               "iso3": "TUV", "number": 798, "continent_code": "OC"}
+    assert (await async_client.post("/countries/", json=country)).status_code == 200
+    last_modified = await _last_modified(async_client, "/countries/?limit=-1")
+    headers = {"If-Modified-Since": last_modified}
+    assert (await async_client.get("/countries/?limit=-1", headers=headers)).status_code == 304
+
+    assert (await async_client.delete("/countries/TV")).status_code == 200
+    response = await async_client.get("/countries/?limit=-1", headers=headers)
+    assert response.status_code == 200
+    assert "TV" not in [row["code"] for row in response.json()]
+
+
+async def test_if_modified_since_in_the_future_is_ignored(async_client):
+    await _last_modified(async_client, "/continents/")
+    headers = {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    assert (await async_client.get("/continents/", headers=headers)).status_code == 200
+
+
+async def test_csv_export_has_a_header(async_client, monkeypatch):
+    response = await async_client.get("/countries/export", params={"format": "csv", "fields": "code,name"})
+    lines = response.text.splitlines()
+    assert lines[0] == "code,name"
+    assert "FR,France" in lines
+
+    async def no_rows(session, batch_size=500, fields=None):
+        return
+        yield
+
+    monkeypatch.setattr(sys.modules["app.routers.country_router"], "stream_countries", no_rows)
+    response = await async_client.get("/countries/export", params={"format": "csv", "fields": "code,name"})
+    assert response.text.splitlines() == ["code,name"]
+
+
+async def test_change_feed_entries_commit_in_seq_order():
+    async with TestingSessionLocal() as first, TestingSessionLocal() as second:
+        since = await get_latest_change_seq(first)
+        await first.commit()
+
+        await lock_change_log(first)
+        log_change(first, "country", "FR", {"code": "FR"})
+        await first.flush()
+
+        async def append_second():
+            await lock_change_log(second)
+            log_change(second, "country", "DE", {"code": "DE"})
+            await second.commit()
+
+        # The second writer has to wait for the first one to commit
+        pending = asyncio.create_task(append_second())
+        await asyncio.sleep(0.2)
+        assert not pending.done()
+        await first.commit()
+        await pending
+
+        changes = await get_changes(first, since=since)
+        assert [change.code for change in changes] == ["FR", "DE"]
+        assert changes[0].seq < changes[1].seq
+
+
+async def test_change_log_lock_on_postgresql():
+    executed = []
+
+    class Session:
+        bind = type("Bind", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+
+        async def execute(self, statement, params=None):
+            executed.append((str(statement), params))
+
+    await lock_change_log(Session())
+    assert executed and "pg_advisory_xact_lock" in executed[0][0]
+
+
+@pytest.mark.parametrize("dry_run, logged", [(True, True), (False, False)])
+async def test_sync_logs_rows_only_on_dry_runs(caplog, monkeypatch, dry_run, logged):
+    from app import initial_data
+
+    rows = {"continents": CONTINENTS, "countries": COUNTRIES + [
+        {"code": "NR", "name": "Nauru", "full_name": "Republic of Nauru", "iso3": "NRU", "number": 520, "continent_code": "OC"},
+    ]}
+    monkeypatch.setattr(initial_data, "collect_rows", lambda sql: rows)
+
+    async def read_source(source):
+        return ""
+
+    monkeypatch.setattr(initial_data, "read_source", read_source)
+    with caplog.at_level("INFO", logger="app.initial_data"):
+        await initial_data.init_db(dry_run=dry_run)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("countries:") for message in messages)
+    assert ("  + NR" in messages) is logged
+    await refresh_snapshot()
+
+
+@pytest.fixture
+async def replica(monkeypatch, tmp_path):
+    """
+    A second SQLite database holding a single country, configured as the only read replica.
+    """
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(Continent.__table__.insert(), [{"code": "OC", "name": "Oceania"}])
+        await conn.execute(Country.__table__.insert(), [
+            {"code": "RP", "name": "Replica", "full_name": "Replica", "iso3": "RPL", "number": 999, "continent_code": "OC"},
+        ])
+    for name, value in (("engines", [replica_engine]), ("healthy", [True]), ("lag", [0.0])):
+        monkeypatch.setattr(database.replicas, name, value)
+    assert dependencies.replicas is database.replicas
+    yield replica_engine
+    await replica_engine.dispose()
+
+
+async def test_read_session_routes_selects_to_the_replica(replica):
+
+    async with read_session() as session:
+        assert (await session.execute(select(Country.code))).scalars().all() == ["RP"]
+        # Lambda statements are routed like the SELECT they wrap
+        statement = lambda_stmt(lambda: select(Country.code))
+        assert (await session.execute(statement)).scalars().all() == ["RP"]
+        statement += lambda s: s.order_by(Country.code)
+        assert session.sync_session.get_bind(clause=statement) is replica.sync_engine
+        locking = lambda_stmt(lambda: select(Country.code).with_for_update())
+        assert session.sync_session.get_bind(clause=locking) is engine.sync_engine
+    async with read_session(primary=True) as session:
+        assert "FR" in (await session.execute(select(Country.code))).scalars().all()
+
+
+async def test_export_reads_from_the_replica_until_the_client_writes(replica):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/countries/export", params={"format": "csv", "fields": "code"})
+        assert response.text.split() == ["code", "RP"]
+
+        # A write pins the client to the primary so it reads its own changes
+        response = await client.put("/countries/FR", json={"full_name": "French Republic"})
+        assert "read_primary_until" in response.cookies
+        response = await client.get("/countries/export", params={"format": "csv", "fields": "code"})
+        assert "FR" in response.text.split()
+
+
+@pytest.mark.parametrize("identifier, code", [("FR", "FR"), ("fra", "FR"), ("250", "FR"), ("040", None), ("²", None), ("٢٥٠", None)])
+async def test_resolve_any_code(async_client, identifier, code):
+    response = await async_client.get(f"/countries/resolve/{identifier}")
+    if code is None:
+        assert response.status_code == 404
+    else:
+        assert response.json()["code"] == code
+
+
+async def test_prime_statement_cache_compiles_the_name_lookup():
+    fresh = create_async_engine(engine.url)
+    lookups = []
+
+    @event.listens_for(fresh.sync_engine, "after_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        lookups.append(context.cache_hit.name)
+
+    async with AsyncSession(fresh) as session:
+        await prime_statement_cache(session)
+        lookups.clear()
+        assert await get_country_by_name_cached(session, "Never Looked Up") is None
+    await fresh.dispose()
+    assert lookups == ["CACHE_HIT"]
+
+
+async def test_ready_reports_unavailable_while_the_database_is_down(async_client, monkeypatch):
+    main = sys.modules["app.main"]
+
+    async def refuse():
+        raise ConnectionRefusedError("Connection refused")
+
+    monkeypatch.setattr(main, "get_snapshot", refuse)
+    monkeypatch.setattr(app.state, "ready", False, raising=False)
+    monkeypatch.setattr(app.state, "stopping", False, raising=False)
+    response = await async_client.get("/ready")
+    assert response.status_code == 503
+
+
+async def test_resolve_names_json(async_client):
+    body = '["france", "  United   States ", "Atlantis", "\\ud800", "Åland"]'
+    response = await async_client.post("/countries/resolve-names", content=body,
+                                       headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"name": "france", "code": "FR", "continent_code": "EU", "continent": "Europe"},
+        {"name": "  United   States ", "code": "US", "continent_code": "NA", "continent": "North America"},
+        {"name": "Atlantis", "code": None, "continent_code": None, "continent": None},
+        {"name": "\ud800", "code": None, "continent_code": None, "continent": None},
+        {"name": "Åland", "code": None, "continent_code": None, "continent": None},
+    ]
+    assert (await async_client.post("/countries/resolve-names", json=[])).json() == []
+
+
+@pytest.mark.parametrize("body", ['{"names": ["France"]}', '["France", 1]', '["France"'])
+async def test_resolve_names_json_rejects_other_bodies(async_client, body):
+    response = await async_client.post("/countries/resolve-names", content=body,
+                                       headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+async def test_resolve_names_ndjson(async_client):
+    body = '"Japan"\n\n{"name": "kenya", "id": 7}\n"Atlantis"\n"\\ud800"\n{"name": "Germany"}'
+    response = await async_client.post("/countries/resolve-names", content=body,
+                                       headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["name"], line["code"]) for line in lines] == [
+        ("Japan", "JP"), ("kenya", "KE"), ("Atlantis", None), ("\ud800", None), ("Germany", "DE"),
+    ]
+
+
+@pytest.mark.parametrize("line", ["not json", "42", '{"id": 7}', '{"name": null}'])
+async def test_resolve_names_ndjson_reports_the_bad_line(async_client, line):
+    response = await async_client.post("/countries/resolve-names", content=f'"France"\n\n{line}\n"Japan"\n',
+                                       headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 3:")
+
+
+@pytest.mark.parametrize("params", [{"fields": "name,code"}, {"fields": "name,code", "limit": 2}])
+async def test_fields_trim_country_listings(async_client, params):
+    response = await async_client.get("/countries/", params=params)
+    assert response.status_code == 200
+    rows = response.json()
+    assert rows and all(list(row) == ["code", "name"] for row in rows)
+
+
+async def test_fields_trim_single_batch_and_continent_countries(async_client):
+    response = await async_client.get("/countries/FR", params={"fields": "iso3,code"})
+    assert response.json() == {"code": "FR", "iso3": "FRA"}
+
+    response = await async_client.get("/countries/batch", params={"codes": "FR,XX", "fields": "name"})
+    assert response.json() == {"countries": [{"name": "France"}], "missing": ["XX"]}
+    response = await async_client.post("/countries/batch", params={"fields": "code", "include": "continent"},
+                                       json={"codes": ["FR"]})
+    assert response.json()["countries"][0]["code"] == "FR"
+    assert response.json()["countries"][0]["continent"]["code"] == "EU"
+    assert list(response.json()["countries"][0]) == ["code", "continent"]
+
+    response = await async_client.get("/continents/EU/countries", params={"fields": "code"})
+    assert response.json() == [{"code": "DE"}, {"code": "FR"}]
+
+    assert (await async_client.get("/countries/FR", params={"fields": "code,capital"})).status_code == 400
+
+
+def _sample(text, line_prefix):
+    return next((float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(line_prefix)), 0.0)
+
+
+async def test_metrics_count_responses_by_route_template(async_client):
+    responses = 'http_responses_total{method="GET",route="/countries/{country_code}",status="404"}'
+    durations = 'http_request_duration_seconds_count{method="GET",route="/countries/{country_code}"}'
+    before = (await async_client.get("/metrics")).text
+
+    assert (await async_client.get("/countries/FR")).status_code == 200
+    assert (await async_client.get("/countries/ZZ")).status_code == 404
+    assert (await async_client.get("/no/such/path")).status_code == 404
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+    assert _sample(after, responses) == _sample(before, responses) + 1
+    assert _sample(after, durations) == _sample(before, durations) + 2
+    assert _sample(after, 'http_responses_total{method="GET",route="<unmatched>",status="404"}') >= 1
+    assert '# TYPE cache_hits_total counter' in after
+    assert 'cache_entries{cache="country_name"}' in after
+    assert 'db_statement_duration_seconds_count{statement="SELECT"}' in after
+
+
+async def _batch(async_client, method, codes, **params):
+    if method == "get":
+        return await async_client.get("/countries/batch", params={"codes": ",".join(codes), **params})
+    return await async_client.post("/countries/batch", params=params, json={"codes": codes})
+
+
+@pytest.mark.parametrize("method", ["get", "post"])
+async def test_batch_lookup(async_client, method):
+    response = await _batch(async_client, method, ["US", " fr", "XX", "FR", "jp", "xx"])
+    assert response.status_code == 200
+    body = response.json()
+    # Request order, case-insensitive, without duplicates
+    assert [c["code"] for c in body["countries"]] == ["US", "FR", "JP"]
+    assert body["missing"] == ["XX"]
+    assert body["countries"][0] == {
+        "code": "US", "name": "United States", "full_name": "United States of America",
+        "iso3": "USA", "number": 840, "continent_code": "NA", "updated_at": body["countries"][0]["updated_at"],
+    }
+
+    response = await _batch(async_client, method, ["KE"], include="continent")
+    assert response.json()["countries"][0]["continent"]["name"] == "Africa"
+
+    assert (await _batch(async_client, method, [])).json() == {"countries": [], "missing": []}
+
+
+@pytest.mark.parametrize("method", ["get", "post"])
+async def test_batch_lookup_size_limit(async_client, method):
+    codes = [f"{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}{i // 676}" for i in range(1001)]
+    assert (await _batch(async_client, method, codes[:1000])).status_code == 200
+    response = await _batch(async_client, method, codes)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "At most 1000 codes per request"
+    # Duplicates do not count against the limit
+    assert (await _batch(async_client, method, codes[:1000] + [c.lower() for c in codes[:50]])).status_code == 200
+
+
+async def _raw(async_client, path, accept_encoding):
+    async with async_client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+async def test_full_listing_is_served_precompressed(async_client, monkeypatch):
+    path = "/countries/?limit=-1"
+    response, plain = await _raw(async_client, path, "identity")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    response, body = await _raw(async_client, path, "br;q=0, gzip;q=0.5")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == plain
+    assert int(response.headers["content-length"]) == len(body)
+
+    class FakeBrotli:
+        @staticmethod
+        def compress(body):
+            return b"br:" + body
+
+    monkeypatch.setattr(sys.modules["app.responses"], "brotli", FakeBrotli)
+    response, body = await _raw(async_client, path, "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert body == b"br:" + plain
+
+
+async def test_precompressed_bodies_are_rebuilt_after_a_write(async_client):
+    path = "/countries/?limit=-1"
+    _, before = await _raw(async_client, path, "gzip")
+    assert b"The Republic of France" not in gzip.decompress(before)
+    assert (await async_client.put("/countries/FR", json={"full_name": "The Republic of France"})).status_code == 200
+    try:
+        _, after = await _raw(async_client, path, "gzip")
+        assert b"The Republic of France" in gzip.decompress(after)
+    finally:
+        assert (await async_client.put("/countries/FR", json={"full_name": "French Republic"})).status_code == 200
+
+
+@pytest.mark.parametrize("path, include", [
+    ("/countries/", "capital"),
+    ("/countries/FR", "continent,capital"),
+    ("/countries/batch?codes=FR", "countries"),
+    ("/countries/search/France", "continents"),
+    ("/continents/", "continent"),
+    ("/continents/EU", "countries,capital"),
+])
+async def test_unknown_include_is_rejected(async_client, path, include):
+    response = await async_client.get(path, params={"include": include})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown include")
+
+
+async def test_include_embeds_related_records(async_client):
+    europe = {"code": "EU", "name": "Europe"}
+    for path in ("/countries/FR", "/countries/search/france"):
+        response = await async_client.get(path, params={"include": " continent "})
+        assert response.status_code == 200
+        assert {k: response.json()["continent"][k] for k in europe} == europe
+    assert "continent" not in (await async_client.get("/countries/FR")).json()
+
+    rows = (await async_client.get("/countries/", params={"include": "continent", "limit": -1})).json()
+    assert all(row["continent"]["code"] == row["continent_code"] for row in rows)
+
+    response = await async_client.get("/continents/EU", params={"include": "countries"})
+    assert [c["code"] for c in response.json()["countries"]] == ["DE", "FR"]
+    response = await async_client.get("/continents/", params={"include": "countries", "limit": -1})
+    by_code = {row["code"]: [c["code"] for c in row["countries"]] for row in response.json()}
+    assert by_code["EU"] == ["DE", "FR"] and by_code["AN"] == []
+
+
+async def test_continent_stats_follow_writes(async_client):
+    async def stats():
+        body = (await async_client.get("/continents/stats")).json()
+        return body, {row["code"]: row for row in body["continents"]}
+
+    body, by_code = await stats()
+    total = body["total_countries"]
+    assert total == len((await async_client.get("/countries/", params={"limit": -1})).json())
+    assert total == sum(row["country_count"] for row in body["continents"])
+    assert by_code["EU"] == {"code": "EU", "name": "Europe", "country_count": 2, "country_codes": ["DE", "FR"]}
+    assert by_code["AN"]["country_count"] == 0 and by_code["AN"]["country_codes"] == []
+
+    country = {"code": "BE", "name": "Belgium", "full_name": "Kingdom of Belgium",
+               "iso3": "BEL", "number": 56, "continent_code": "EU"}
+    assert (await async_client.post("/countries/", json=country)).status_code == 200
+    try:
+        body, by_code = await stats()
+        assert body["total_countries"] == total + 1
+        assert by_code["EU"]["country_codes"] == ["BE", "DE", "FR"]
+
+        assert (await async_client.put("/countries/BE", json={"continent_code": "AF"})).status_code == 200
+        _, by_code = await stats()
+        assert by_code["EU"]["country_codes"] == ["DE", "FR"]
+        assert by_code["AF"]["country_codes"] == ["BE", "KE"]
+        response = await async_client.get("/continents/AF/countries")
+        assert [c["code"] for c in response.json()] == ["BE", "KE"]
+    finally:
+        assert (await async_client.delete("/countries/BE")).status_code == 200
+    _, by_code = await stats()
+    assert by_code["AF"]["country_codes"] == ["KE"]
+
+
+async def test_countries_of_a_continent(async_client):
+    response = await async_client.get("/continents/EU/countries")
+    assert response.status_code == 200
+    assert [c["code"] for c in response.json()] == ["DE", "FR"]
+    assert (await async_client.get("/continents/AN/countries")).json() == []
+    for code in ("XX", "eu"):
+        response = await async_client.get(f"/continents/{code}/countries")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Continent not found"
@@ -0,0 +1,227 @@
+import asyncio
+import json
+
+import pytest
+
+from app.crud.cache import AsyncTTLCache, RedisCache, TieredCache
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(10)))
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert cache.coalesced == 9
+    assert await cache.get_or_load("key", load) == "value"
+    assert cache.hits == 1
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    cache = AsyncTTLCache()
+    started = asyncio.Event()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.01)
+        return calls
+
+    leader = asyncio.create_task(cache.get_or_load("key", load))
+    await started.wait()
+    followers = [asyncio.create_task(cache.get_or_load("key", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await asyncio.gather(*followers) == [2, 2, 2]
+    assert calls == 2
+
+
+async def test_load_started_before_invalidation_is_not_stored():
+    cache = AsyncTTLCache()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "stale"
+
+    pending = asyncio.create_task(cache.get_or_load("key", load))
+    await asyncio.sleep(0)
+    await cache.invalidate("key")
+    release.set()
+    assert await pending == "stale"
+
+    async def fresh():
+        return "fresh"
+
+    assert await cache.get_or_load("key", fresh) == "fresh"
+
+
+async def test_load_errors_reach_every_waiter_and_are_not_cached():
+    cache = AsyncTTLCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise LookupError("boom")
+
+    results = await asyncio.gather(*(cache.get_or_load("key", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, LookupError) for result in results)
+    assert cache.local_size() == 0
+
+
+class DownRedis:
+    """
+    Client double for a Redis that refuses every command.
+    """
+
+    async def _refuse(self, *args, **kwargs):
+        raise ConnectionError("Connection refused")
+
+    get = set = delete = publish = _refuse
+
+    async def scan_iter(self, *args, **kwargs):
+        raise ConnectionError("Connection refused")
+        yield
+
+
+async def test_redis_failures_fall_through_to_the_loader():
+    cache = RedisCache("test", client=DownRedis())
+
+    async def load():
+        return "value"
+
+    assert await cache.get_or_load("key", load) == "value"
+    assert cache.misses == 1
+    # Invalidations are logged and dropped rather than raised
+    await cache.invalidate("key")
+    await cache.clear()
+
+
+async def test_tiered_cache_serves_l1_while_redis_is_down():
+    cache = TieredCache(AsyncTTLCache(), RedisCache("test", client=DownRedis()))
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        return "value"
+
+    assert await cache.get_or_load("key", load) == "value"
+    assert await cache.get_or_load("key", load) == "value"
+    assert loads == 1 and cache.l1_hits == 1
+
+    # A failed invalidation still drops this node's copy
+    await cache.invalidate("key")
+    assert cache.local_size() == 0
+    await cache.local._set("other", "value")
+    await cache.clear()
+    assert cache.local_size() == 0
+
+
+class FlakyPubSub:
+    """
+    Pub/sub double whose first subscription fails, like a Redis that is briefly down.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def subscribe(self, channel):
+        self.client.subscriptions += 1
+        if self.client.subscriptions == 1:
+            raise ConnectionError("Connection refused")
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        if self.client.messages:
+            return {"type": "message", "data": self.client.messages.pop(0)}
+        await asyncio.sleep(0.001)
+        return None
+
+    async def aclose(self):
+        pass
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.subscriptions = 0
+        self.messages = []
+
+    def pubsub(self):
+        return FlakyPubSub(self)
+
+
+async def _eventually(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.002)
+    raise AssertionError("condition not met")
+
+
+async def test_tiered_listener_resubscribes_and_clears_l1():
+    client = FlakyRedis()
+    cache = TieredCache(AsyncTTLCache(), RedisCache("test", client=client))
+    cache.retry_delay = 0.001
+    await cache.local._set("stale", "value")
+
+    await cache.start()
+    try:
+        await _eventually(lambda: client.subscriptions == 2)
+        await _eventually(lambda: cache.local_size() == 0)
+
+        await cache.local._set("key", "value")
+        client.messages += ["not json", json.dumps(["other"])]
+        await _eventually(lambda: not client.messages)
+        # A malformed message drops L1 rather than risking stale entries
+        assert cache.local_size() == 0
+
+        await cache.local._set("key", "value")
+        client.messages.append(json.dumps(["key"]))
+        await _eventually(lambda: cache.local_size() == 0)
+    finally:
+        await cache.stop()
+    assert cache._listener is None
+
+
+async def test_tiered_caches_share_invalidations_over_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    nodes = [TieredCache(AsyncTTLCache(), RedisCache("test", client=fakeredis.FakeAsyncRedis(server=server)))
+             for _ in range(2)]
+    for node in nodes:
+        await node.start()
+    try:
+        for _ in range(500):
+            if (await nodes[0].shared.client.pubsub_numsub("test:invalidate"))[0][1] == 2:
+                break
+            await asyncio.sleep(0.002)
+        loads = 0
+
+        async def load():
+            nonlocal loads
+            loads += 1
+            return "value"
+
+        assert await nodes[0].get_or_load("key", load) == "value"
+        # The second node warms up from Redis instead of loading
+        assert await nodes[1].get_or_load("key", load) == "value"
+        assert loads == 1 and nodes[1].l2_hits == 1
+
+        await nodes[0].invalidate("key")
+        await _eventually(lambda: nodes[1].local_size() == 0)
+        assert await nodes[1].get_or_load("key", load) == "value"
+        assert loads == 2
+    finally:
+        for node in nodes:
+            await node.stop()
@@ -0,0 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.crud.coalesce import WriteCoalescer
+
+
+class FakeSession:
+    """
+    Just enough of an AsyncSession for WriteCoalescer; commit_error makes the COMMIT fail.
+    """
+
+    def __init__(self, commit_error=None):
+        self.commit_error = commit_error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+        if self.commit_error:
+            raise self.commit_error
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+def operation(value):
+    async def run(session):
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return run
+
+
+async def test_failing_after_commit_does_not_fail_committed_writes(caplog):
+    recovered = []
+
+    async def after_commit(session, written):
+        raise ConnectionError("cache unavailable")
+
+    async def on_after_commit_error():
+        recovered.append(True)
+
+    coalescer = WriteCoalescer(FakeSession, window=0.001, after_commit=after_commit,
+                               on_after_commit_error=on_after_commit_error)
+    results = await asyncio.gather(
+        coalescer.submit(operation(1)), coalescer.submit(operation(ValueError("bad row"))), coalescer.submit(operation(2)),
+        return_exceptions=True,
+    )
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+    assert recovered == [True]
+    assert "cache unavailable" in caplog.text
+
+
+async def test_failing_commit_fails_every_caller():
+    coalescer = WriteCoalescer(lambda: FakeSession(commit_error=ConnectionError("lost")), window=0.001)
+    results = await asyncio.gather(coalescer.submit(operation(1)), coalescer.submit(operation(2)),
+                                   return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
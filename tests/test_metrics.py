@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.metrics import Counter, Histogram, db_statement_duration, db_statement_rows, instrument_engine
+
+
+def _count(histogram, *labelvalues):
+    counts, _ = histogram._values.get(labelvalues, ([0], [0.0]))
+    return sum(counts)
+
+
+async def test_failed_statements_are_timed_and_leave_no_start_time_behind():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine, name="test")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+            updated = _count(db_statement_rows, "UPDATE")
+            await conn.execute(text("UPDATE t SET x = x + 1"))
+            assert _count(db_statement_rows, "UPDATE") == updated + 1
+            assert db_statement_rows._values[("UPDATE",)][0][2] >= 1  # 3 rows falls in the (1, 10] bucket
+
+            selects = _count(db_statement_duration, "SELECT")
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM missing"))
+            assert _count(db_statement_duration, "SELECT") == selects + 3
+            assert (await conn.get_raw_connection()).info["query_start"] == {}
+    finally:
+        await engine.dispose()
+
+
+def test_render_prometheus_text():
+    counter = Counter("things_total", "Things", ("kind",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    assert list(counter.render()) == [
+        "# HELP things_total Things", "# TYPE things_total counter", 'things_total{kind="a\\"b"} 3',
+    ]
+
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(5)
+    assert list(histogram.render())[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1', 'latency_seconds_bucket{le="1.0"} 1',
+        'latency_seconds_bucket{le="+Inf"} 2', "latency_seconds_sum 5.05", "latency_seconds_count 2",
+    ]
@@ -0,0 +1,32 @@
+import pytest
+
+from app import responses
+
+
+class FakeBrotli:
+    @staticmethod
+    def compress(body):
+        return b"br:" + body
+
+
+@pytest.mark.parametrize("header, with_brotli, without_brotli", [
+    ("", None, None),
+    ("gzip", "gzip", "gzip"),
+    ("gzip, deflate, br", "br", "gzip"),
+    ("br;q=0.5, gzip", "gzip", "gzip"),
+    ("br;q=1.0, gzip;q=0.8", "br", "gzip"),
+    ("gzip;q=0", None, None),
+    ("GZIP; Q=0.000", None, None),
+    ("gzip;q=zero", None, None),
+    ("identity", None, None),
+    ("identity;q=1, gzip;q=0.5", None, None),
+    ("identity;q=0.5, gzip", "gzip", "gzip"),
+    ("*", "br", "gzip"),
+    ("*, br;q=0", "gzip", "gzip"),
+    ("deflate", None, None),
+])
+def test_negotiate_encoding(monkeypatch, header, with_brotli, without_brotli):
+    monkeypatch.setattr(responses, "brotli", FakeBrotli)
+    assert responses._negotiate_encoding(header) == with_brotli
+    monkeypatch.setattr(responses, "brotli", None)
+    assert responses._negotiate_encoding(header) == without_brotli
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.aliases import COUNTRY_ALIASES
+from app.crud.search import _edit_distance, build_suggest_index
+from app.initial_data import DATA_FILE, collect_rows
+
+
+@pytest.fixture(scope="module")
+def index():
+    rows = collect_rows(DATA_FILE.read_text(encoding="utf-8"))["countries"]
+    return build_suggest_index([SimpleNamespace(**row) for row in rows], COUNTRY_ALIASES)
+
+
+def test_edit_distance_counts_a_swap_as_one_edit():
+    assert _edit_distance("frnace", "france", 2) == 1
+    assert _edit_distance("kitten", "sitting", 3) == 3
+    assert _edit_distance("abcdef", "ghijkl", 1) == 2
+
+
+@pytest.mark.parametrize("query, code", [("frnace", "FR"), ("untied", "US"), ("germnay", "DE"), ("fance", "FR")])
+def test_suggest_tolerates_typos(index, query, code):
+    assert code in [code for code, _, _ in index.suggest(query)]
+
+
+def test_suggest_does_not_fuzzy_match_two_letter_codes(index):
+    matched = [term for _, term, _ in index.suggest("ger")]
+    assert matched and all(len(term) > 2 for term in matched)
@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud import snapshot as snapshot_module
+from app.crud.shared_snapshot import SharedSnapshotStore
+from app.database import Base
+from app.models.models import Continent, Country
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs fcntl and mmap sharing")
+
+BUILT_AT = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+COUNTRIES = [("FR", "France", "French Republic", "FRA", 250, "EU", BUILT_AT)]
+CONTINENTS = [("EU", "Europe", BUILT_AT)]
+
+
+def test_published_versions_are_seen_by_every_store(tmp_path):
+    writer = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    reader = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    assert reader.version() == 0
+
+    assert writer.publish(COUNTRIES, CONTINENTS, BUILT_AT) == 1
+    assert reader.version() == 1
+    version, built_at, countries, continents = reader.load()
+    assert (version, built_at) == (1, BUILT_AT)
+    assert [tuple(row) for row in countries] == COUNTRIES
+    assert [tuple(row) for row in continents] == CONTINENTS
+
+    assert writer.publish([], CONTINENTS, BUILT_AT) == 2
+    assert reader.version() == 2 and reader.load()[2] == []
+
+
+async def test_cancelled_lock_wait_leaves_the_lock_free(tmp_path):
+    holder = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    waiter = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    acquired = asyncio.Event()
+
+    async def take(store):
+        async with store.lock():
+            acquired.set()
+
+    async with holder.lock():
+        task = asyncio.create_task(take(waiter))
+        await asyncio.sleep(0.05)
+        assert not acquired.is_set()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # Neither the cancelled waiter nor anyone else holds the lock now
+    await asyncio.wait_for(take(holder), timeout=1)
+    await asyncio.wait_for(take(waiter), timeout=1)
+
+
+async def test_snapshot_is_published_and_picked_up_by_other_workers(tmp_path, monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    store = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    other_worker = SharedSnapshotStore(str(tmp_path / "snapshot"))
+    reloads = []
+    monkeypatch.setattr(snapshot_module, "_store", store)
+    monkeypatch.setattr(snapshot_module, "_current", None)
+    monkeypatch.setattr(snapshot_module, "_reload_listeners", [lambda: reloads.append(1)])
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(Continent(code="EU", name="Europe"))
+            session.add(Country(code="FR", name="France", full_name="French Republic",
+                                iso3="FRA", number=250, continent_code="EU"))
+            await session.commit()
+            # A write in this worker rebuilds from the database and publishes
+            snapshot = await snapshot_module.refresh_snapshot(session)
+        assert snapshot.version == store.version() == 1
+        assert [row[0] for row in other_worker.load()[2]] == ["FR"]
+        assert await snapshot_module.get_snapshot() is snapshot
+        assert reloads == []
+
+        # A write in another worker only bumps the counter; readers reload from the data file
+        other_worker.publish(COUNTRIES + [("DE", "Germany", "Federal Republic of Germany", "DEU", 276, "EU", BUILT_AT)],
+                             CONTINENTS, BUILT_AT)
+        reloaded = await snapshot_module.get_snapshot()
+        assert reloaded.version == 2 and reloaded.built_at == BUILT_AT
+        assert sorted(reloaded.country_by_code) == ["DE", "FR"]
+        assert reloads == [1]
+        assert await snapshot_module.get_snapshot() is reloaded
+    finally:
+        await engine.dispose()